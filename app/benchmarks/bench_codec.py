@@ -0,0 +1,66 @@
+"""
+Per-row cost of serialising a `list_members` page.
+
+    python -m app.benchmarks.bench_codec [rows] [repeats]
+
+"model" is the previous path: str(_id), UserInDB(**doc), then FastAPI validating the
+Page against response_model, dumping it to JSON-mode Python and json.dumps.
+"codec" is app/core/codec.py: project to the model's fields and encode directly.
+"""
+import json
+import sys
+import timeit
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pydantic import TypeAdapter
+from app.core.codec import codec_for, dumps
+from app.core.pagination import Page
+from app.models.user import UserInDB
+
+def _documents(rows: int):
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "email": f"member{i}@example.com",
+            "full_name": f"Member Number {i}",
+            "phone": f"0803{i:07d}",
+            "graduation_year": 2000 + i % 25,
+            "contribution_score": i % 100,
+            "role": "Member",
+            "is_active": True,
+            "hashed_password": "$2b$12$" + "x" * 53,
+            "created_at": now - timedelta(days=i),
+            "search_tokens": [f"tok{j}" for j in range(40)],
+        }
+        for i in range(rows)
+    ]
+
+def _model_path(docs, adapter):
+    results = []
+    for doc in docs:
+        doc = dict(doc)
+        doc["_id"] = str(doc["_id"])
+        results.append(UserInDB(**doc))
+    page = Page(items=results, next_cursor=None, total=None)
+    content = adapter.validate_python(page, from_attributes=True)
+    return json.dumps(adapter.dump_python(content, mode="json", by_alias=True)).encode()
+
+def _codec_path(docs, codec):
+    return dumps({"items": codec.views(docs), "next_cursor": None, "total": None})
+
+def main(argv):
+    rows = int(argv[0]) if argv else 200
+    repeats = int(argv[1]) if len(argv) > 1 else 50
+    docs = _documents(rows)
+    adapter = TypeAdapter(Page[UserInDB])
+    codec = codec_for(UserInDB)
+
+    assert json.loads(_model_path(docs, adapter)) == json.loads(_codec_path(docs, codec))
+
+    for name, func in (("model", lambda: _model_path(docs, adapter)), ("codec", lambda: _codec_path(docs, codec))):
+        best = min(timeit.repeat(func, number=1, repeat=repeats))
+        print(f"{name:>6}: {best * 1000:8.3f} ms/page  {best / rows * 1e6:7.2f} us/row  ({rows} rows)")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
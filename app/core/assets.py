@@ -0,0 +1,163 @@
+"""
+Delivery of the HTML views and their static assets.
+
+At startup every file under app/static is fingerprinted (`js/app.js` is served as
+`/static/js/app.<hash>.js` with an immutable, year-long Cache-Control) and every page
+shell is rendered once. Both are kept in memory with gzip and, when the `brotli`
+package is installed, brotli encodings computed up front, so a page hit is a dict
+lookup and a content negotiation.
+"""
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from starlette.requests import Request
+from starlette.responses import Response
+from app.core import http_cache
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Unversioned URLs (old links, direct hits) revalidate after a short while
+UNVERSIONED = "public, max-age=300"
+
+# Below this, compression doesn't pay for the extra header bytes and CPU
+MIN_COMPRESS_SIZE = 512
+
+@dataclass
+class EncodedBody:
+    """
+    A response body with its precomputed encodings, keyed by Content-Encoding.
+    """
+    content_type: str
+    identity: bytes
+    encodings: Dict[str, bytes] = field(default_factory=dict)
+    etag: str = ""
+
+    @classmethod
+    def build(cls, body: bytes, content_type: str) -> "EncodedBody":
+        encoded = cls(content_type, body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+        if len(body) >= MIN_COMPRESS_SIZE:
+            if brotli is not None:
+                encoded.encodings["br"] = brotli.compress(body, quality=11)
+            encoded.encodings["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+        return encoded
+
+    def respond(self, request: Request, cache_control: str) -> Response:
+        headers = {"ETag": self.etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if http_cache.etag_matches(request, self.etag):
+            return Response(status_code=304, headers=headers)
+
+        body = self.identity
+        accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        for encoding in ("br", "gzip"):
+            if encoding in accepted and encoding in self.encodings:
+                body = self.encodings[encoding]
+                headers["Content-Encoding"] = encoding
+                break
+        return Response(body, media_type=self.content_type, headers=headers)
+
+def _accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+class StaticAssets:
+    """
+    ASGI app for /static serving fingerprinted, precompressed files from memory.
+    """
+
+    def __init__(self, directory: str, url_prefix: str = "/static"):
+        self.directory = directory
+        self.url_prefix = url_prefix
+        self._urls: Dict[str, str] = {}  # logical path -> fingerprinted path
+        self._files: Dict[str, EncodedBody] = {}  # fingerprinted path -> body
+
+    def load(self) -> None:
+        urls, files = {}, {}
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                full_path = os.path.join(root, name)
+                logical = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+                with open(full_path, "rb") as f:
+                    body = f.read()
+                content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                if content_type.startswith("text/") or content_type == "application/javascript":
+                    content_type += "; charset=utf-8"
+
+                stem, ext = os.path.splitext(logical)
+                fingerprinted = f"{stem}.{hashlib.sha256(body).hexdigest()[:12]}{ext}"
+                urls[logical] = fingerprinted
+                files[fingerprinted] = EncodedBody.build(body, content_type)
+        self._urls, self._files = urls, files
+        logger.info("Loaded %d static assets from %s", len(files), self.directory)
+
+    def url(self, path: str) -> str:
+        """
+        Fingerprinted URL for a file under the static directory, for templates.
+        """
+        return f"{self.url_prefix}/{self._urls.get(path, path)}"
+
+    def lookup(self, path: str) -> Optional[tuple]:
+        if path in self._files:
+            return self._files[path], IMMUTABLE
+        if path in self._urls:
+            return self._files[self._urls[path]], UNVERSIONED
+        return None
+
+    async def __call__(self, scope, receive, send):
+        request = Request(scope, receive)
+        path = scope["path"]
+        # Mounted apps see the full path, with root_path set to the mount prefix
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        found = self.lookup(path.lstrip("/"))
+        if found is None or request.method not in ("GET", "HEAD"):
+            response = Response("Not Found", status_code=404)
+        else:
+            body, cache_control = found
+            response = body.respond(request, cache_control)
+        await response(scope, receive, send)
+
+class ShellCache:
+    """
+    Page shells rendered once from their Jinja templates. The templates take no
+    per-request data, so one rendering serves every visitor.
+    """
+
+    def __init__(self, env, enabled: bool = True):
+        self.env = env
+        self.enabled = enabled
+        self._shells: Dict[str, EncodedBody] = {}
+
+    def get(self, name: str) -> EncodedBody:
+        shell = self._shells.get(name) if self.enabled else None
+        if shell is None:
+            html = self.env.get_template(name).render().encode()
+            shell = EncodedBody.build(html, "text/html; charset=utf-8")
+            if self.enabled:
+                self._shells[name] = shell
+        return shell
+
+    def prerender(self, names) -> None:
+        for name in names:
+            self.get(name)
+        logger.info("Pre-rendered %d page shells", len(self._shells))
@@ -0,0 +1,105 @@
+"""
+Document-to-response layer.
+
+Handlers that return Mongo documents hand them to `document_response` / `page_response`
+instead of converting `_id` to str, building a `*InDB` model and letting FastAPI
+validate and serialise it again. A `DocumentCodec` shapes the raw document to the
+fields of the response model (aliases, defaults) once, and the encoder writes BSON
+types (ObjectId, datetime, Enum) straight to JSON bytes.
+
+The route's `response_model` is kept for the OpenAPI schema; returning a Response
+skips FastAPI's own validation and serialisation of it.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+from bson import Decimal128, ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback, several times slower
+    orjson = None
+
+def json_default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal128):
+        return float(value.to_decimal())
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def dumps(value: Any) -> bytes:
+    """
+    Encodes documents to JSON bytes, including ObjectId and datetime values.
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=json_default, separators=(",", ":")).encode()
+
+class DocumentResponse(JSONResponse):
+    """
+    JSONResponse rendered with `dumps`, so content may contain raw BSON values.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+_MISSING = object()
+
+class DocumentCodec:
+    """
+    Shapes documents to a response model's fields without validating them.
+    Documents written by this app already satisfy the models; the codec only renames
+    to aliases, fills defaults for absent fields and drops fields the model lacks.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.fields: List[Tuple[str, Any]] = [
+            (info.alias or name, info) for name, info in model.model_fields.items()
+        ]
+        # Mongo projection fetching only what the response needs
+        self.projection: Dict[str, int] = {key: 1 for key, _ in self.fields}
+
+    def view(self, doc: dict) -> dict:
+        out = {}
+        for key, info in self.fields:
+            value = doc.get(key, _MISSING)
+            if value is _MISSING:
+                value = None if info.is_required() else info.get_default(call_default_factory=True)
+            out[key] = value
+        return out
+
+    def views(self, docs: Iterable[dict]) -> List[dict]:
+        view = self.view
+        return [view(doc) for doc in docs]
+
+@lru_cache(maxsize=None)
+def codec_for(model: Type[BaseModel]) -> DocumentCodec:
+    return DocumentCodec(model)
+
+def document_response(doc: dict, model: Optional[Type[BaseModel]] = None, status_code: int = 200) -> DocumentResponse:
+    content = codec_for(model).view(doc) if model is not None else doc
+    return DocumentResponse(content, status_code=status_code)
+
+def page_response(
+    docs: List[dict],
+    model: Optional[Type[BaseModel]] = None,
+    next_cursor: Optional[str] = None,
+    total: Optional[int] = None,
+) -> DocumentResponse:
+    """
+    Same envelope as `Page`; pass model=None for rows that are already response-shaped.
+    """
+    items = codec_for(model).views(docs) if model is not None else docs
+    return DocumentResponse({"items": items, "next_cursor": next_cursor, "total": total})
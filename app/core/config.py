@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import List, Optional, Union
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import AnyHttpUrl, field_validator
 
@@ -9,11 +9,116 @@ class Settings(BaseSettings):
     # MongoDB
     MONGODB_URL: str
     DATABASE_NAME: str = "Useeyumaru2_App"  # Extracted from connection string usually, but explicit here
+    ENSURE_INDEXES_ON_STARTUP: bool = True  # see app/models/indexes.py
+
+    # MongoDB connection pool (see app/db/mongodb.py)
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 10
+    MONGO_MAX_IDLE_TIME_MS: int = 300000
+    MONGO_MAX_CONNECTING: int = 4  # concurrent handshakes per server; caps cold-start storms
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = 2000  # fail fast when the pool is saturated
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGO_CONNECT_TIMEOUT_MS: int = 5000
+    MONGO_SOCKET_TIMEOUT_MS: int = 0  # none: reports, exports and rebuilds may run long
+    MONGO_INTERACTIVE_MAX_TIME_MS: int = 5000  # server-side limit for paginated listings and search
+    MONGO_COMPRESSORS: str = ""  # e.g. "zstd,zlib"; empty disables wire compression
+    MONGO_READ_PREFERENCE: str = "primary"
+    MONGO_WARMUP_CONNECTIONS: int = 10  # opened during startup, before serving traffic
+
+    # Read-only listings and reports go to secondaries (see secondary_reads in app/db/mongodb.py)
+    SECONDARY_READS_ENABLED: bool = True
+    SECONDARY_READ_PREFERENCE: str = "secondaryPreferred"
+    SECONDARY_MAX_STALENESS_SECONDS: int = 90  # MongoDB's minimum; -1 for no limit
+    SECONDARY_READ_CONCERN: str = "majority"
     
     # Security
     SECRET_KEY: str = "changethis-secret-key-for-jwt-tokens-in-production"
     ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+
+    # Claims-based auth and refresh tokens (see app/core/tokens.py)
+    STATELESS_ACCESS_TOKENS: bool = True  # False looks the user up on every request
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    TOKEN_REVOCATION_SYNC_SECONDS: float = 2.0
+
+    # Password hashing (see PasswordHasher in app/core/security.py)
+    BCRYPT_ROUNDS: int = 12  # changing this rehashes passwords on next login
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = 5.0
+
+    # Rate limits (see app/core/rate_limit.py), as "<requests>/<seconds>" token buckets
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_STORE: str = "memory"  # "mongo" shares buckets across worker processes
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False  # only behind a proxy that sets X-Forwarded-For
+    RATE_LIMIT_LOGIN_PER_IP: str = "20/60"
+    RATE_LIMIT_LOGIN_PER_ACCOUNT: str = "5/60"
+    RATE_LIMIT_REGISTER_PER_IP: str = "10/3600"
+    RATE_LIMIT_WRITE_PER_IP: str = "60/60"
+    RATE_LIMIT_WRITE_PER_ACCOUNT: str = "10/60"
+
+    # Authenticated user cache (see app/core/user_cache.py)
+    USER_CACHE_MAX_SIZE: int = 1024
+    USER_CACHE_TTL_SECONDS: int = 60
+
+    # Background jobs (see app/services/job_service.py)
+    JOB_MAX_CONCURRENCY: int = 2
+    JOB_HEARTBEAT_SECONDS: int = 15
+    JOB_STALE_SECONDS: int = 300  # an active job with no heartbeat for this long is abandoned
+
+    # Buffered audit log writer (see app/services/audit_service.py)
+    AUDIT_QUEUE_MAX_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 200
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+
+    # Treasurer reports (see app/services/report_service.py)
+    REPORT_CACHE_TTL_SECONDS: int = 300
+    REPORT_CACHE_MAX_ROWS: int = 5000
+
+    # Streaming exports: documents fetched per cursor round trip
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Observability (see app/core/metrics.py)
+    LOG_LEVEL: str = "INFO"
+    METRICS_ENABLED: bool = True
+    SLOW_REQUEST_THRESHOLD_SECONDS: float = 1.0
+
+    # ETag version counters, see app/core/http_cache.py
+    CACHE_VERSION_SYNC_SECONDS: float = 2.0
+
+    # Page shells and static assets (see app/core/assets.py); disable the shell cache
+    # while editing templates so changes show without a restart
+    VIEWS_CACHE_ENABLED: bool = True
+    # API responses below this many bytes are sent uncompressed
+    GZIP_MINIMUM_SIZE: int = 1024
+
+    # Replayed responses for requests sent with an Idempotency-Key header
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_LEASE_SECONDS: int = 30  # a retry may take over a key held longer than this
+
+    # Bulk member import (see app/services/import_service.py)
+    IMPORT_MAX_ROWS: int = 5000
+    IMPORT_HASH_CONCURRENCY: int = 3  # keep below PASSWORD_HASH_WORKERS so logins still get a worker
+
+    # Reminder delivery (see app/services/transports.py)
+    REMINDER_TRANSPORT: str = "log"  # log | file | smtp
+    REMINDER_OUTBOX_PATH: str = "outbox/reminders.jsonl"
+    REMINDER_CONCURRENCY: int = 20
+    REMINDER_MAX_RETRIES: int = 3
+    REMINDER_RETRY_BACKOFF_SECONDS: float = 0.5
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 1025
+    SMTP_FROM: str = "noreply@example.com"
+    SMTP_USERNAME: Optional[str] = None
+    SMTP_PASSWORD: Optional[str] = None
+
+    # Scheduler: 5-field cron expressions in UTC, empty string disables a job
+    SCHEDULER_ENABLED: bool = True
+    # Longer than JOB_STALE_SECONDS, so a dead worker's job is replaceable when its slot is taken over
+    SCHEDULER_CLAIM_LEASE_SECONDS: int = 360
+    SCHEDULE_GENERATE_MONTHLY: str = "0 1 1 * *"  # 01:00 on the 1st
+    SCHEDULE_MARK_LATE: str = "30 1 * * *"  # 01:30 daily
+    SCHEDULE_REMINDERS: str = "0 7 * * 1"  # 07:00 on Mondays
     
     # CORS
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
@@ -1,28 +1,37 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from app.core import security
 from app.core.config import settings
-from app.models.user import UserInDB
+from app.core.tokens import revocations
+from app.core.user_cache import user_cache
+from app.models.user import Principal, UserInDB
 from app.db.mongodb import get_database
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from bson import ObjectId
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncIOMotorDatabase = Depends(get_database)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+def _decode(token: str) -> dict:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
     except JWTError:
         raise credentials_exception
+    if payload.get("sub") is None:
+        raise credentials_exception
+    # Tokens issued before claims-based auth carry no uid; the user lookup vets those
+    if payload.get("uid") and revocations.is_revoked(payload["uid"], payload.get("ver", 0)):
+        raise credentials_exception
+    return payload
+
+async def _load_user(email: str, db: AsyncIOMotorDatabase) -> UserInDB:
+    cached_user = user_cache.get(email)
+    if cached_user is not None:
+        return cached_user
     
     user = await db.users.find_one({"email": email})
     if user is None:
@@ -32,17 +41,49 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncIOMotor
     if "_id" in user:
         user["_id"] = str(user["_id"])
         
-    return UserInDB(**user)
+    current_user = UserInDB(**user)
+    user_cache.set(email, current_user)
+    return current_user
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncIOMotorDatabase = Depends(get_database)):
+    """
+    The full user record, for endpoints that return or need more than the token claims.
+    """
+    payload = _decode(token)
+    return await _load_user(payload["sub"], db)
 
-async def get_current_active_user(current_user: UserInDB = Depends(get_current_user)):
+async def get_current_principal(token: str = Depends(oauth2_scheme), db: AsyncIOMotorDatabase = Depends(get_database)):
+    """
+    The caller as described by their access token, without a database round trip.
+    """
+    payload = _decode(token)
+    if settings.STATELESS_ACCESS_TOKENS and payload.get("uid") and payload.get("role"):
+        return Principal(
+            id=payload["uid"], email=payload["sub"], role=payload["role"], is_active=payload.get("active", True)
+        )
+    user = await _load_user(payload["sub"], db)
+    return Principal(id=user.id, email=user.email, role=user.role, is_active=user.is_active)
+
+async def get_current_active_user(current_user: Principal = Depends(get_current_principal)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
-async def get_current_admin_user(current_user: UserInDB = Depends(get_current_active_user)):
+ADMIN_ROLES = ["Super Admin", "Chairman", "Secretary", "Treasurer"]
+
+async def get_current_admin_user(current_user: Principal = Depends(get_current_active_user)):
     # Super Admin or Chairman can be considered 'Admin' for broad purposes, 
     # but strict role checks should be done in specific endpoints
-    if current_user.role not in ["Super Admin", "Chairman", "Secretary", "Treasurer"]:
+    if current_user.role not in ADMIN_ROLES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, 
+            detail="The user doesn't have enough privileges"
+        )
+    return current_user
+
+async def get_current_auditor_user(current_user: Principal = Depends(get_current_active_user)):
+    # Read-only access to financial records and audit trails
+    if current_user.role not in ADMIN_ROLES + ["Auditor"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, 
             detail="The user doesn't have enough privileges"
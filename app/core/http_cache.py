@@ -0,0 +1,145 @@
+"""
+Conditional GETs for member-facing reads.
+
+Each member has a version counter per scope (`me`, `contributions`, `welfare`) in the
+`cache_versions` collection, bumped by the write paths that change what that scope
+returns; a document with _id "*" holds versions bumped by jobs that touch every member.
+Counters are mirrored in-process and refreshed every CACHE_VERSION_SYNC_SECONDS, so
+an `If-None-Match` revalidation is answered with 304 without touching Mongo. Writes
+made by another worker process become visible here after at most one sync interval.
+"""
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, Optional
+from fastapi import Request, Response
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ALL_MEMBERS = "*"
+
+# Re-read this much before the previous sync, covering in-flight writes and clock skew
+SYNC_OVERLAP = timedelta(seconds=5)
+
+ME = "me"
+CONTRIBUTIONS = "contributions"
+WELFARE = "welfare"
+
+class CacheVersions:
+    def __init__(self, sync_interval: float):
+        self.sync_interval = sync_interval
+        self._versions: Dict[str, Dict[str, int]] = {}
+        self._synced_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, user_id: str, scope: str) -> tuple:
+        return (
+            self._versions.get(ALL_MEMBERS, {}).get(scope, 0),
+            self._versions.get(user_id, {}).get(scope, 0),
+        )
+
+    async def bump(self, db: AsyncIOMotorDatabase, user_ids: Iterable[str], *scopes: str) -> None:
+        """
+        Marks `scopes` as changed for each member (or ALL_MEMBERS).
+        """
+        user_ids = [user_id for user_id in dict.fromkeys(user_ids) if user_id]
+        if not user_ids:
+            return
+        now = datetime.utcnow()
+        inc = {scope: 1 for scope in scopes}
+        await db.cache_versions.bulk_write([
+            UpdateOne({"_id": user_id}, {"$inc": inc, "$set": {"updated_at": now}}, upsert=True)
+            for user_id in user_ids
+        ], ordered=False)
+        # Read the stored counters back so this worker never serves a 304 for data it just changed
+        self._merge(await db.cache_versions.find({"_id": {"$in": user_ids}}).to_list(length=None))
+
+    def _merge(self, docs) -> None:
+        for doc in docs:
+            local = self._versions.setdefault(doc["_id"], {})
+            for scope, version in doc.items():
+                if scope not in ("_id", "updated_at"):
+                    local[scope] = max(local.get(scope, 0), version)
+
+    async def sync(self, db: AsyncIOMotorDatabase) -> int:
+        """
+        Loads counters changed since the previous sync (all of them on the first call).
+        """
+        started = datetime.utcnow()
+        query = {"updated_at": {"$gte": self._synced_at - SYNC_OVERLAP}} if self._synced_at else {}
+        docs = await db.cache_versions.find(query).to_list(length=None)
+        self._merge(docs)
+        self._synced_at = started
+        return len(docs)
+
+    def start(self, db: AsyncIOMotorDatabase) -> None:
+        self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self, db: AsyncIOMotorDatabase) -> None:
+        while True:
+            try:
+                await self.sync(db)
+            except Exception:
+                logger.exception("Failed to sync cache versions")
+            await asyncio.sleep(self.sync_interval)
+
+cache_versions = CacheVersions(sync_interval=settings.CACHE_VERSION_SYNC_SECONDS)
+
+async def bump(db: AsyncIOMotorDatabase, user_ids: Iterable[str], *scopes: str) -> None:
+    await cache_versions.bump(db, user_ids, *scopes)
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha256("|".join(map(str, parts)).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+async def conditional_get(
+    request: Request,
+    user_id: str,
+    scope: str,
+    build: Callable[[], Awaitable[Response]],
+) -> Response:
+    """
+    Answers with 304 when the client's ETag matches the member's current version of
+    `scope`; otherwise builds the response and tags it. The ETag also covers the query
+    string, so each page of a listing is validated separately.
+
+    The tag vouches for the body, so `build` must read current data: the primary, not
+    a secondary or an in-process cache that another worker's write can't clear.
+    """
+    # Read the version before building: a write landing mid-build changes it again
+    etag = make_etag(scope, user_id, *cache_versions.get(user_id, scope), request.url.query)
+    cache_control = "private, no-cache"
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+
+    response = await build()
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    return response
@@ -0,0 +1,97 @@
+"""
+Idempotency keys for unsafe endpoints.
+
+A client sends `Idempotency-Key: <uuid>` and may retry the same request freely: the
+first request runs and its response is stored; retries get the stored response back
+instead of running again. Keys are scoped to the caller and expire after
+IDEMPOTENCY_KEY_TTL_SECONDS (TTL index on idempotency_keys.created_at).
+"""
+import hashlib
+import json
+import math
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+from app.core.config import settings
+
+MAX_KEY_LENGTH = 255
+
+def fingerprint(*parts: Any) -> str:
+    """
+    Identifies the request a key was first used with, so a reused key with a
+    different request is rejected rather than answered with the wrong response.
+    """
+    payload = json.dumps(jsonable_encoder(parts), sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+async def run_idempotent(
+    db: AsyncIOMotorDatabase,
+    key: Optional[str],
+    actor_id: str,
+    request_fingerprint: str,
+    func: Callable[[], Awaitable[Any]],
+) -> Any:
+    """
+    Runs `func` once per (actor, key) and replays its response to retries. Without a
+    key it simply runs `func`. Failed attempts release the key so the client can retry.
+    A key is held under a lease of IDEMPOTENCY_LEASE_SECONDS; if the holder never
+    finishes, a retry after the lease takes over and runs `func` again, so `func`
+    must itself be safe to repeat (the verification paths are, via their status guards).
+    """
+    if not key:
+        return await func()
+    if len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail="Idempotency-Key is too long")
+
+    key_id = f"{actor_id}:{key}"
+    lock = ObjectId()
+    now = datetime.utcnow()
+    lease = timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)
+    try:
+        await db.idempotency_keys.insert_one({
+            "_id": key_id,
+            "fingerprint": request_fingerprint,
+            "state": "in_progress",
+            "lock": lock,
+            "locked_until": now + lease,
+            "created_at": now,
+        })
+    except DuplicateKeyError:
+        existing = await db.idempotency_keys.find_one({"_id": key_id})
+        if existing is None:
+            # Expired between the insert and the read; treat as a fresh attempt
+            return await run_idempotent(db, key, actor_id, request_fingerprint, func)
+        if existing["fingerprint"] != request_fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+        if existing["state"] == "done":
+            return existing["response"]
+        # The holder died or lost its completion write once its lease runs out; take over
+        taken = await db.idempotency_keys.find_one_and_update(
+            {"_id": key_id, "state": "in_progress", "locked_until": {"$lt": now}},
+            {"$set": {"lock": lock, "locked_until": now + lease}},
+        )
+        if taken is None:
+            retry_after = (existing.get("locked_until", now) - now).total_seconds()
+            raise HTTPException(
+                status_code=409,
+                detail="A request with this Idempotency-Key is still in progress",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
+    try:
+        response = await func()
+    except BaseException:
+        # Release the key so a failed attempt can be retried
+        await db.idempotency_keys.delete_one({"_id": key_id, "lock": lock})
+        raise
+
+    response = jsonable_encoder(response)
+    await db.idempotency_keys.update_one(
+        {"_id": key_id, "lock": lock},
+        {"$set": {"state": "done", "response": response, "completed_at": datetime.utcnow()}},
+    )
+    return response
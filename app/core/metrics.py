@@ -0,0 +1,224 @@
+"""
+Request and MongoDB instrumentation, exposed in Prometheus text format on /metrics.
+
+`MetricsMiddleware` times every request and counts it by route template and status.
+Routers included with a prefix are registered through `label_routes`, so their
+templates are labelled with the full path.
+`MongoCommandListener` is registered on the Motor client; each command it sees is
+attributed to the request that issued it through a context variable (Motor copies
+the caller's context into its executor threads), so handlers that make many round
+trips per request stand out in `http_request_mongo_commands` and the slow-request log.
+"""
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+from pymongo import monitoring
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _labels(**labels: str) -> Labels:
+    return tuple(sorted(labels.items()))
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = _labels(**labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type}"
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(labels)} {value}"
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Labels, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _labels(**labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, series in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket{_format_labels(labels, ('le', le))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {series[-1]}"
+            yield f"{self.name}_count{_format_labels(labels)} {cumulative}"
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by method, route and status code.")
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency by method and route.")
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+HTTP_MONGO_COMMANDS = Histogram(
+    "http_request_mongo_commands", "MongoDB commands issued per HTTP request, by route.", COUNT_BUCKETS
+)
+HTTP_MONGO_SECONDS = Histogram(
+    "http_request_mongo_seconds", "Time spent in MongoDB commands per HTTP request, by route."
+)
+MONGO_COMMANDS = Counter("mongo_commands_total", "MongoDB commands by command name and outcome.")
+MONGO_LATENCY = Histogram("mongo_command_duration_seconds", "MongoDB command latency by command name.")
+RATE_LIMITED = Counter("rate_limited_total", "Requests rejected with 429 by rate limit.")
+
+REGISTRY = [
+    HTTP_REQUESTS, HTTP_LATENCY, HTTP_IN_FLIGHT, HTTP_MONGO_COMMANDS, HTTP_MONGO_SECONDS,
+    MONGO_COMMANDS, MONGO_LATENCY, RATE_LIMITED,
+]
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+@dataclass
+class RequestStats:
+    mongo_commands: int = 0
+    mongo_seconds: float = 0.0
+
+# Set per request by MetricsMiddleware; mutated (not replaced) by the listener so that
+# commands run in Motor's executor threads are counted against the request
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+class MongoCommandListener(monitoring.CommandListener):
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def _record(self, event, outcome: str) -> None:
+        seconds = event.duration_micros / 1e6
+        MONGO_COMMANDS.inc(command=event.command_name, outcome=outcome)
+        MONGO_LATENCY.observe(seconds, command=event.command_name)
+        stats = current_request.get()
+        if stats is not None:
+            stats.mongo_commands += 1
+            stats.mongo_seconds += seconds
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._record(event, "success")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._record(event, "failure")
+
+# id(route) -> template including its router prefix, see label_routes()
+_route_labels: Dict[int, str] = {}
+
+def label_routes(router, prefix: str = "") -> None:
+    """
+    Records the full template of every route in `router` as included under `prefix`.
+    The matched route only carries its own path, so without this /api/v1/admin/members
+    and /api/v1/exports/members would share the label "/members".
+    """
+    for route in router.routes:
+        path = getattr(route, "path", None)
+        if path is not None:
+            _route_labels[id(route)] = prefix + path
+
+def _route_label(scope, root_path: str) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return _route_labels.get(id(route)) or getattr(route, "path", None) or "unmatched"
+    # A Mount (e.g. /static) extends root_path before handing over to its app
+    return scope.get("root_path", "")[len(root_path):] or "unmatched"
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware so streamed responses are timed to their last byte.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        root_path = scope.get("root_path", "")
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                message["headers"] = list(message["headers"]) + [(
+                    b"server-timing",
+                    f"app;dur={elapsed_ms:.1f}, db;dur={stats.mongo_seconds * 1000:.1f}".encode(),
+                )]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            current_request.reset(token)
+            self._observe(scope, root_path, status_code, time.perf_counter() - started, stats)
+
+    def _observe(self, scope, root_path: str, status_code: int, seconds: float, stats: RequestStats) -> None:
+        # Route templates keep label cardinality bounded; unmatched paths share one label
+        path = _route_label(scope, root_path)
+        method = scope["method"]
+
+        HTTP_REQUESTS.inc(method=method, route=path, status=str(status_code))
+        HTTP_LATENCY.observe(seconds, method=method, route=path)
+        HTTP_MONGO_COMMANDS.observe(stats.mongo_commands, route=path)
+        HTTP_MONGO_SECONDS.observe(stats.mongo_seconds, route=path)
+
+        if seconds >= settings.SLOW_REQUEST_THRESHOLD_SECONDS:
+            logger.warning(
+                "Slow request: %s %s -> %d in %.1f ms (%d mongo commands, %.1f ms)",
+                method, scope.get("path"), status_code, seconds * 1000,
+                stats.mongo_commands, stats.mongo_seconds * 1000,
+            )
@@ -0,0 +1,121 @@
+import base64
+import binascii
+import json
+from typing import Generic, List, Optional, Sequence, Tuple, TypeVar
+from bson import json_util
+from bson.errors import BSONError
+from fastapi import HTTPException, Query
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pydantic import BaseModel
+from app.core.config import settings
+
+T = TypeVar("T")
+
+SortSpec = Sequence[Tuple[str, int]]
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+class Page(BaseModel, Generic[T]):
+    """
+    Response envelope shared by every list endpoint.
+    Pass `next_cursor` back as `cursor` to fetch the following page; it is null on the last page.
+    """
+    items: List[T]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+class PageParams:
+    """
+    Query parameters for paginated endpoints, used as `params: PageParams = Depends()`.
+    """
+
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        include_total: bool = False,
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.include_total = include_total
+
+def _sort_signature(sort: SortSpec) -> str:
+    return ",".join(f"{field}:{direction}" for field, direction in sort)
+
+def encode_cursor(doc: dict, sort: SortSpec) -> str:
+    payload = {"s": _sort_signature(sort), "v": [doc.get(field) for field, _ in sort]}
+    raw = json_util.dumps(payload).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(token: str, sort: SortSpec) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json_util.loads(raw)
+    except (binascii.Error, ValueError, TypeError, json.JSONDecodeError, BSONError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+    if (
+        not isinstance(payload, dict)
+        or payload.get("s") != _sort_signature(sort)
+        or not isinstance(payload.get("v"), list)
+        or len(payload["v"]) != len(sort)
+    ):
+        raise HTTPException(status_code=400, detail="Pagination cursor does not match this listing")
+    # Values go straight into the filter; a document or array would be read as operators
+    if any(isinstance(value, (dict, list)) for value in payload["v"]):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return payload["v"]
+
+def keyset_filter(sort: SortSpec, values: list) -> dict:
+    """
+    Matches documents strictly after `values` in `sort` order, e.g. for [(year, -1), (_id, -1)]:
+    {"$or": [{"year": {"$lt": y}}, {"year": y, "_id": {"$lt": id}}]}
+    """
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {prev_field: values[j] for j, (prev_field, _) in enumerate(sort[:i])}
+        clause[field] = {"$lt" if direction < 0 else "$gt": values[i]}
+        clauses.append(clause)
+    return {"$or": clauses}
+
+async def paginate(
+    collection: AsyncIOMotorCollection,
+    query: dict,
+    sort: SortSpec,
+    params: PageParams,
+    projection: dict = None,
+    session=None,
+) -> Tuple[List[dict], Optional[str], Optional[int]]:
+    """
+    Fetches one page of raw documents using keyset (seek) pagination, so every page costs
+    the same index range scan however deep it is. `sort` must end with `_id` to be unique
+    and should match an index. Queries are capped at MONGO_INTERACTIVE_MAX_TIME_MS.
+    Returns (documents, next_cursor, total).
+    """
+    if not sort or sort[-1][0] != "_id":
+        raise ValueError("Keyset pagination requires `_id` as the final sort key")
+
+    page_query = query
+    if params.cursor:
+        after = keyset_filter(sort, decode_cursor(params.cursor, sort))
+        page_query = {"$and": [query, after]} if query else after
+
+    cursor = (
+        collection.find(page_query, projection, session=session)
+        .sort(list(sort))
+        .limit(params.limit + 1)
+        .max_time_ms(settings.MONGO_INTERACTIVE_MAX_TIME_MS)
+    )
+    docs = await cursor.to_list(length=params.limit + 1)
+
+    next_cursor = None
+    if len(docs) > params.limit:
+        docs = docs[:params.limit]
+        next_cursor = encode_cursor(docs[-1], sort)
+
+    total = (
+        await collection.count_documents(query, session=session, maxTimeMS=settings.MONGO_INTERACTIVE_MAX_TIME_MS)
+        if params.include_total else None
+    )
+    return docs, next_cursor, total
@@ -0,0 +1,231 @@
+"""
+Token-bucket rate limits for login, registration and member write endpoints.
+
+Each limit is "<requests>/<seconds>": a bucket holds up to `requests` tokens and
+refills at requests/seconds per second, so short bursts pass and sustained floods
+are turned away with 429 and a Retry-After. Buckets are kept per client IP and, where
+the caller is known, per account. The limit dependencies run before the handler, so
+a rejected login never reaches the users lookup or bcrypt.
+
+The per-account login bucket is only checked up front and is spent by failed
+verifications alone; otherwise anyone could lock a member out by sending logins
+for their email from a handful of addresses.
+
+RATE_LIMIT_STORE selects where buckets live: "memory" (per process) or "mongo"
+(the `rate_limits` collection, shared by every worker). If Mongo is unreachable the
+limiter falls back to its in-memory buckets rather than failing the request.
+"""
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordRequestForm
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from app.core import deps
+from app.core.config import settings
+from app.core.metrics import RATE_LIMITED
+from app.db.mongodb import get_database
+from app.models.user import Principal
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class RateLimit:
+    name: str
+    capacity: int
+    per_seconds: float
+
+    @classmethod
+    def parse(cls, name: str, spec: str) -> "RateLimit":
+        requests, _, seconds = spec.partition("/")
+        return cls(name, int(requests), float(seconds))
+
+    @property
+    def refill_rate(self) -> float:
+        return self.capacity / self.per_seconds
+
+    def retry_after(self, tokens: float) -> float:
+        return (1 - tokens) / self.refill_rate
+
+class MemoryStore:
+    """
+    Buckets in a bounded LRU; evicting an idle bucket only forgets a client that
+    would have refilled by now anyway.
+    """
+    name = "memory"
+
+    def __init__(self, max_size: int = 100000):
+        self.max_size = max_size
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _refilled(self, key: str, limit: RateLimit, now: float) -> float:
+        tokens, updated = self._buckets.get(key, (limit.capacity, now))
+        return min(limit.capacity, tokens + (now - updated) * limit.refill_rate)
+
+    async def take(self, key: str, limit: RateLimit) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._refilled(key, limit, now)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_size:
+                self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else limit.retry_after(tokens)
+
+    async def peek(self, key: str, limit: RateLimit) -> Tuple[bool, float]:
+        with self._lock:
+            tokens = self._refilled(key, limit, time.monotonic())
+        allowed = tokens >= 1
+        return allowed, 0.0 if allowed else limit.retry_after(tokens)
+
+class MongoStore:
+    """
+    Buckets in the `rate_limits` collection, refilled and spent in one atomic
+    pipeline update so concurrent workers can't both take the last token.
+    """
+    name = "mongo"
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+
+    async def take(self, key: str, limit: RateLimit) -> Tuple[bool, float]:
+        now = datetime.utcnow()
+        elapsed_seconds = {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}
+        refilled = {"$min": [
+            limit.capacity,
+            {"$add": [{"$ifNull": ["$tokens", limit.capacity]}, {"$multiply": [elapsed_seconds, limit.refill_rate]}]},
+        ]}
+        bucket = await self.db.rate_limits.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled, "updated_at": now}},
+                {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+                {"$set": {
+                    "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                    # A bucket idle this long is full again, so the TTL index may drop it
+                    "expires_at": now + timedelta(seconds=limit.per_seconds),
+                }},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        allowed = bucket["allowed"]
+        return allowed, 0.0 if allowed else limit.retry_after(bucket["tokens"])
+
+    async def peek(self, key: str, limit: RateLimit) -> Tuple[bool, float]:
+        bucket = await self.db.rate_limits.find_one({"_id": key})
+        if bucket is None:
+            return True, 0.0
+        elapsed = (datetime.utcnow() - bucket["updated_at"]).total_seconds()
+        tokens = min(limit.capacity, bucket["tokens"] + max(0.0, elapsed) * limit.refill_rate)
+        allowed = tokens >= 1
+        return allowed, 0.0 if allowed else limit.retry_after(tokens)
+
+class RateLimiter:
+    def __init__(self, store_name: str, enabled: bool = True):
+        self.store_name = store_name
+        self.enabled = enabled
+        self.memory = MemoryStore()
+        self.rejected = 0
+        self.store_errors = 0
+
+    def _store(self, db: Optional[AsyncIOMotorDatabase]):
+        if self.store_name == "mongo" and db is not None:
+            return MongoStore(db)
+        return self.memory
+
+    async def _apply(self, op: str, limit: RateLimit, key: str, db: Optional[AsyncIOMotorDatabase]) -> None:
+        if not self.enabled:
+            return
+        bucket_key = f"{limit.name}:{key}"
+        try:
+            allowed, retry_after = await getattr(self._store(db), op)(bucket_key, limit)
+        except PyMongoError:
+            self.store_errors += 1
+            logger.warning("Rate limit store unavailable, using in-process buckets", exc_info=True)
+            allowed, retry_after = await getattr(self.memory, op)(bucket_key, limit)
+        if allowed:
+            return
+
+        self.rejected += 1
+        RATE_LIMITED.inc(limit=limit.name)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, please try again later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+    async def hit(self, limit: RateLimit, key: str, db: Optional[AsyncIOMotorDatabase] = None) -> None:
+        """
+        Spends one token from `key`'s bucket for `limit`, raising 429 when it is empty.
+        """
+        await self._apply("take", limit, key, db)
+
+    async def check(self, limit: RateLimit, key: str, db: Optional[AsyncIOMotorDatabase] = None) -> None:
+        """
+        Raises 429 when `key`'s bucket for `limit` is empty, without spending from it.
+        """
+        await self._apply("peek", limit, key, db)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "store": self.store_name,
+            "rejected": self.rejected,
+            "store_errors": self.store_errors,
+        }
+
+rate_limiter = RateLimiter(settings.RATE_LIMIT_STORE, enabled=settings.RATE_LIMIT_ENABLED)
+
+LOGIN_PER_IP = RateLimit.parse("login_ip", settings.RATE_LIMIT_LOGIN_PER_IP)
+LOGIN_PER_ACCOUNT = RateLimit.parse("login_account", settings.RATE_LIMIT_LOGIN_PER_ACCOUNT)
+REGISTER_PER_IP = RateLimit.parse("register_ip", settings.RATE_LIMIT_REGISTER_PER_IP)
+WRITE_PER_IP = RateLimit.parse("write_ip", settings.RATE_LIMIT_WRITE_PER_IP)
+WRITE_PER_ACCOUNT = RateLimit.parse("write_account", settings.RATE_LIMIT_WRITE_PER_ACCOUNT)
+
+def login_account(username: str) -> str:
+    return username.strip().lower()
+
+def client_ip(request: Request) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            # The proxy appends the address it saw; earlier entries are client-supplied
+            return forwarded.split(",")[-1].strip()
+    return request.client.host if request.client else "unknown"
+
+async def limit_login(
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+):
+    await rate_limiter.hit(LOGIN_PER_IP, client_ip(request), db)
+    await rate_limiter.check(LOGIN_PER_ACCOUNT, login_account(form_data.username), db)
+
+async def record_failed_login(db: AsyncIOMotorDatabase, username: str) -> None:
+    """
+    Charges a failed verification to the account's login bucket.
+    """
+    await rate_limiter.hit(LOGIN_PER_ACCOUNT, login_account(username), db)
+
+async def limit_register(request: Request, db: AsyncIOMotorDatabase = Depends(get_database)):
+    await rate_limiter.hit(REGISTER_PER_IP, client_ip(request), db)
+
+async def limit_member_write(
+    request: Request,
+    current_user: Principal = Depends(deps.get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+):
+    await rate_limiter.hit(WRITE_PER_IP, client_ip(request), db)
+    await rate_limiter.hit(WRITE_PER_ACCOUNT, current_user.id, db)
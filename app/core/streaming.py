@@ -0,0 +1,65 @@
+import csv
+import io
+from datetime import date, datetime
+from enum import Enum
+from typing import AsyncIterator, List
+from bson import ObjectId
+from fastapi.responses import StreamingResponse
+from app.core.codec import dumps, json_default
+
+# Rows are buffered into chunks of this many before being written to the socket
+ROWS_PER_CHUNK = 200
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return dumps(value).decode()
+    if isinstance(value, (ObjectId, datetime, date, Enum)):
+        return json_default(value)
+    return value
+
+async def _ndjson_chunks(rows: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    buffer = []
+    async for row in rows:
+        buffer.append(dumps(row))
+        if len(buffer) >= ROWS_PER_CHUNK:
+            yield b"\n".join(buffer) + b"\n"
+            buffer = []
+    if buffer:
+        yield b"\n".join(buffer) + b"\n"
+
+async def _csv_chunks(rows: AsyncIterator[dict], fields: List[str]) -> AsyncIterator[bytes]:
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    count = 0
+    async for row in rows:
+        writer.writerow({field: _csv_value(row.get(field)) for field in fields})
+        count += 1
+        if count % ROWS_PER_CHUNK == 0:
+            yield out.getvalue().encode()
+            out.seek(0)
+            out.truncate()
+    if out.tell():
+        yield out.getvalue().encode()
+
+def ndjson_response(rows: AsyncIterator[dict], filename: str) -> StreamingResponse:
+    """
+    Streams rows as newline-delimited JSON as they are produced, without materialising the result.
+    """
+    return StreamingResponse(
+        _ndjson_chunks(rows),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}.ndjson"'},
+    )
+
+def csv_response(rows: AsyncIterator[dict], fields: List[str], filename: str) -> StreamingResponse:
+    """
+    Streams rows as CSV with the given columns; nested values are written as JSON.
+    """
+    return StreamingResponse(
+        _csv_chunks(rows, fields),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{filename}.csv"'},
+    )
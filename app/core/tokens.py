@@ -0,0 +1,181 @@
+"""
+Access tokens, refresh tokens and revocation.
+
+Access tokens are short-lived JWTs carrying the member's id, role and active flag, so
+the deps in app/core/deps.py authorise from the claims without a users lookup.
+Refresh tokens are opaque random strings stored (as a sha256) in `refresh_tokens`;
+each use rotates the token and reloads the member, so a new access token always
+reflects the current role.
+
+Every access token carries the member's `token_version` as its `ver` claim. Revoking a
+member increments that counter, deletes their refresh tokens and records the new
+version in `token_revocations`; tokens with an older `ver` are rejected. Comparing
+counters rather than issue times keeps revocation exact whatever the clocks of the
+issuing and revoking hosts say. Revocations are mirrored in-process and refreshed
+every TOKEN_REVOCATION_SYNC_SECONDS, so a deactivation made on another worker applies
+here within seconds. An entry is only kept until every access token it could reject
+has expired, which keeps the set small.
+"""
+import asyncio
+import hashlib
+import logging
+import secrets
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from app.core import security
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ACCESS_TOKEN_LIFETIME = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+
+# Re-read this much before the previous sync, covering in-flight writes and clock skew
+SYNC_OVERLAP = timedelta(seconds=5)
+# Revocations outlive the access tokens they reject by this much, covering clock skew
+EXPIRY_MARGIN = timedelta(minutes=5)
+
+def create_access_token(user: dict) -> str:
+    return security.create_access_token(
+        data={
+            "sub": user["email"],
+            "uid": str(user["_id"]),
+            "role": user.get("role"),
+            "active": user.get("is_active", True),
+            "ver": user.get("token_version", 0),
+        },
+        expires_delta=ACCESS_TOKEN_LIFETIME,
+    )
+
+def _hash(refresh_token: str) -> str:
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+async def issue_tokens(db: AsyncIOMotorDatabase, user: dict) -> dict:
+    """
+    A new access token and a new stored refresh token for `user`.
+    """
+    refresh_token = secrets.token_urlsafe(32)
+    now = datetime.utcnow()
+    await db.refresh_tokens.insert_one({
+        "_id": _hash(refresh_token),
+        "user_id": str(user["_id"]),
+        "created_at": now,
+        "expires_at": now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    })
+    return {
+        "access_token": create_access_token(user),
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+        "expires_in": int(ACCESS_TOKEN_LIFETIME.total_seconds()),
+    }
+
+async def redeem_refresh_token(db: AsyncIOMotorDatabase, refresh_token: str) -> Optional[dict]:
+    """
+    Consumes `refresh_token` and returns its member, or None when the token is unknown,
+    expired, already used, or the member is no longer active.
+    """
+    stored = await db.refresh_tokens.find_one_and_delete({"_id": _hash(refresh_token)})
+    if not stored or stored["expires_at"] < datetime.utcnow():
+        return None
+    try:
+        user = await db.users.find_one({"_id": ObjectId(stored["user_id"])})
+    except InvalidId:
+        return None
+    if not user or not user.get("is_active", True):
+        return None
+    return user
+
+async def discard_refresh_token(db: AsyncIOMotorDatabase, refresh_token: str) -> None:
+    await db.refresh_tokens.delete_one({"_id": _hash(refresh_token)})
+
+class Revocations:
+    def __init__(self, sync_interval: float):
+        self.sync_interval = sync_interval
+        # user id -> (lowest valid token version, monotonic time it was learned)
+        self._min_versions: Dict[str, Tuple[int, float]] = {}
+        self._synced_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def is_revoked(self, user_id: str, version: int) -> bool:
+        entry = self._min_versions.get(user_id)
+        return entry is not None and version < entry[0]
+
+    def _merge(self, user_id: str, min_version: int) -> None:
+        current = self._min_versions.get(user_id)
+        if current is None or min_version > current[0]:
+            self._min_versions[user_id] = (min_version, time.monotonic())
+
+    async def revoke(self, db: AsyncIOMotorDatabase, user_id: str) -> None:
+        """
+        Signs the member out everywhere: outstanding access tokens stop working and
+        refresh tokens are deleted, so the next login picks up their current state.
+        """
+        user = await db.users.find_one_and_update(
+            {"_id": ObjectId(user_id)},
+            {"$inc": {"token_version": 1}},
+            projection={"token_version": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if user is None:
+            return
+        now = datetime.utcnow()
+        await db.token_revocations.update_one(
+            {"_id": user_id},
+            {
+                "$max": {"min_version": user["token_version"]},
+                "$set": {"updated_at": now, "expires_at": now + ACCESS_TOKEN_LIFETIME + EXPIRY_MARGIN},
+            },
+            upsert=True,
+        )
+        await db.refresh_tokens.delete_many({"user_id": user_id})
+        self._merge(user_id, user["token_version"])
+
+    def _prune(self) -> None:
+        # Tokens older than this have all expired, so their revocations can go
+        horizon = time.monotonic() - (ACCESS_TOKEN_LIFETIME + EXPIRY_MARGIN).total_seconds()
+        self._min_versions = {
+            user_id: entry for user_id, entry in self._min_versions.items() if entry[1] > horizon
+        }
+
+    async def sync(self, db: AsyncIOMotorDatabase) -> int:
+        """
+        Loads revocations recorded since the previous sync (all live ones on the first call).
+        """
+        started = datetime.utcnow()
+        query = {"updated_at": {"$gte": self._synced_at - SYNC_OVERLAP}} if self._synced_at else {}
+        docs = await db.token_revocations.find(query, {"min_version": 1}).to_list(length=None)
+        for doc in docs:
+            self._merge(doc["_id"], doc["min_version"])
+        self._prune()
+        self._synced_at = started
+        return len(docs)
+
+    def stats(self) -> dict:
+        return {"revoked_users": len(self._min_versions)}
+
+    def start(self, db: AsyncIOMotorDatabase) -> None:
+        self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self, db: AsyncIOMotorDatabase) -> None:
+        while True:
+            try:
+                await self.sync(db)
+            except Exception:
+                logger.exception("Failed to sync token revocations")
+            await asyncio.sleep(self.sync_interval)
+
+revocations = Revocations(sync_interval=settings.TOKEN_REVOCATION_SYNC_SECONDS)
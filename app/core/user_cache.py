@@ -0,0 +1,100 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.models.user import UserInDB
+
+
+class UserCache:
+    """
+    In-process LRU/TTL cache of authenticated users, keyed by token subject (email).
+    Saves the users lookup that every authenticated request would otherwise make.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, UserInDB]]" = OrderedDict()
+        self._subjects_by_id: Dict[str, str] = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, subject: str) -> Optional[UserInDB]:
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, user = entry
+            if expires_at < time.monotonic():
+                self._remove(subject)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(subject)
+            self.hits += 1
+            return user
+
+    def set(self, subject: str, user: UserInDB) -> None:
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            if subject in self._entries:
+                self._remove(subject)
+            self._entries[subject] = (time.monotonic() + self.ttl_seconds, user)
+            if user.id:
+                self._subjects_by_id[user.id] = subject
+
+            while len(self._entries) > self.max_size:
+                oldest, (_, evicted) = self._entries.popitem(last=False)
+                self._forget_id(oldest, evicted)
+                self.evictions += 1
+
+    def invalidate(self, subject: str) -> None:
+        with self._lock:
+            self._remove(subject)
+
+    def invalidate_id(self, user_id: str) -> None:
+        with self._lock:
+            subject = self._subjects_by_id.get(user_id)
+            if subject is not None:
+                self._remove(subject)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._subjects_by_id.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _remove(self, subject: str) -> None:
+        entry = self._entries.pop(subject, None)
+        if entry is not None:
+            self._forget_id(subject, entry[1])
+
+    def _forget_id(self, subject: str, user: UserInDB) -> None:
+        if user.id and self._subjects_by_id.get(user.id) == subject:
+            del self._subjects_by_id[user.id]
+
+
+user_cache = UserCache(
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+)
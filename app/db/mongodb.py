@@ -1,12 +1,118 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import monitoring, read_preferences
+from pymongo.errors import OperationFailure
+from pymongo.read_concern import ReadConcern
 from app.core.config import settings
+from app.core.metrics import MongoCommandListener
+
+logger = logging.getLogger(__name__)
+
+# Returned by standalone servers, which cannot run multi-document transactions
+ILLEGAL_OPERATION = 20
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """
+    Tracks connection pool usage per server for /health: open and in-use connections,
+    requests waiting for a connection, and checkouts that timed out waiting.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._servers = defaultdict(lambda: {
+            "open": 0, "in_use": 0, "waiting": 0, "max_waiting": 0, "checkout_timeouts": 0, "cleared": 0,
+        })
+
+    def _update(self, address, **deltas):
+        with self._lock:
+            server = self._servers[f"{address[0]}:{address[1]}"]
+            for key, delta in deltas.items():
+                server[key] += delta
+            server["max_waiting"] = max(server["max_waiting"], server["waiting"])
+
+    def stats(self) -> dict:
+        with self._lock:
+            servers = {address: dict(server) for address, server in self._servers.items()}
+        return {
+            "max_pool_size": settings.MONGO_MAX_POOL_SIZE,
+            "min_pool_size": settings.MONGO_MIN_POOL_SIZE,
+            "servers": servers,
+        }
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._update(event.address, cleared=1)
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._update(event.address, open=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._update(event.address, open=-1)
+
+    def connection_check_out_started(self, event):
+        self._update(event.address, waiting=1)
+
+    def connection_check_out_failed(self, event):
+        if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+            self._update(event.address, waiting=-1, checkout_timeouts=1)
+        else:
+            self._update(event.address, waiting=-1)
+
+    def connection_checked_out(self, event):
+        self._update(event.address, waiting=-1, in_use=1)
+
+    def connection_checked_in(self, event):
+        self._update(event.address, in_use=-1)
 
 class Database:
     client: AsyncIOMotorClient = None
+    # The one handle every caller uses; always settings.DATABASE_NAME
+    database: AsyncIOMotorDatabase = None
+    supports_transactions: bool = True
+
+    def __init__(self):
+        self.pool_monitor = PoolMonitor()
 
     def connect(self):
-        self.client = AsyncIOMotorClient(settings.MONGODB_URL)
-        print("Connected to MongoDB via Motor")
+        options = {
+            "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+            "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+            "maxIdleTimeMS": settings.MONGO_MAX_IDLE_TIME_MS,
+            "maxConnecting": settings.MONGO_MAX_CONNECTING,
+            "waitQueueTimeoutMS": settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            "connectTimeoutMS": settings.MONGO_CONNECT_TIMEOUT_MS,
+            "socketTimeoutMS": settings.MONGO_SOCKET_TIMEOUT_MS or None,
+            "readPreference": settings.MONGO_READ_PREFERENCE,
+            "appname": settings.PROJECT_NAME,
+        }
+        if settings.MONGO_COMPRESSORS:
+            options["compressors"] = settings.MONGO_COMPRESSORS
+        self.client = AsyncIOMotorClient(
+            settings.MONGODB_URL,
+            event_listeners=[MongoCommandListener(), self.pool_monitor],
+            **options,
+        )
+        self.database = self.client[settings.DATABASE_NAME]
+        logger.info(
+            "Connected to MongoDB via Motor (pool %d-%d, database %s)",
+            settings.MONGO_MIN_POOL_SIZE, settings.MONGO_MAX_POOL_SIZE, settings.DATABASE_NAME,
+        )
 
     def split_db_from_uri(self):
         """
@@ -14,12 +120,72 @@ class Database:
         """
         pass
 
+    async def warm_up(self, connections: int):
+        """
+        Opens `connections` pooled connections before traffic arrives, so the first
+        requests after a cold start don't all queue behind connection handshakes.
+        """
+        if connections <= 0:
+            return
+        await asyncio.gather(*(self.client.admin.command("ping") for _ in range(connections)))
+        logger.info("Warmed MongoDB pool with %d connections", connections)
+
+    def pool_stats(self) -> dict:
+        return self.pool_monitor.stats()
+
     def close(self):
         if self.client:
             self.client.close()
-            print("Closed MongoDB connection")
+            self.client = None
+            self.database = None
+            logger.info("Closed MongoDB connection")
 
 db = Database()
 
 async def get_database():
-    return db.client[settings.DATABASE_NAME]
+    return db.database
+
+_READ_PREFERENCES = {
+    "primary": read_preferences.Primary,
+    "primaryPreferred": read_preferences.PrimaryPreferred,
+    "secondary": read_preferences.Secondary,
+    "secondaryPreferred": read_preferences.SecondaryPreferred,
+    "nearest": read_preferences.Nearest,
+}
+
+@lru_cache(maxsize=None)
+def _secondary_read_options():
+    mode = _READ_PREFERENCES[settings.SECONDARY_READ_PREFERENCE]
+    if mode is read_preferences.Primary:
+        preference = mode()
+    else:
+        preference = mode(max_staleness=settings.SECONDARY_MAX_STALENESS_SECONDS)
+    return preference, ReadConcern(settings.SECONDARY_READ_CONCERN)
+
+def secondary_reads(collection: AsyncIOMotorCollection) -> AsyncIOMotorCollection:
+    """
+    Handle for read-only listings and reports that tolerate a few seconds of replication
+    lag, routed away from the primary. Never use it for reads that feed a write, or for
+    a member's own records, which they expect to see right after changing them.
+    """
+    if not settings.SECONDARY_READS_ENABLED:
+        return collection
+    preference, concern = _secondary_read_options()
+    return collection.with_options(read_preference=preference, read_concern=concern)
+
+async def run_in_transaction(callback):
+    """
+    Runs `await callback(session)` inside a multi-document transaction, retrying on
+    transient errors. On a standalone server the callback runs once with session=None.
+    """
+    if db.supports_transactions:
+        async with await db.client.start_session() as session:
+            try:
+                result = await session.with_transaction(callback)
+            except OperationFailure as e:
+                if e.code != ILLEGAL_OPERATION:
+                    raise
+                db.supports_transactions = False
+            else:
+                return result
+    return await callback(None)
@@ -1,16 +1,63 @@
+import logging
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pymongo.errors import ExecutionTimeout
+from app.core import metrics
 from app.core.config import settings
-from app.db.mongodb import db
-from app.routers import auth, admin, contributions, views, welfare
+from app.core.http_cache import cache_versions
+from app.core.rate_limit import rate_limiter
+from app.core.tokens import revocations
+from app.core.security import password_hasher
+from app.core.user_cache import user_cache
+from app.db.mongodb import db, get_database
+from app.models.indexes import ensure_indexes, verify_unique_indexes
+from app.routers import auth, admin, contributions, exports, reports, views, welfare
+from app.services import search_service, summary_service
+from app.services.audit_service import audit_sink
+from app.services.job_service import JobAlreadyRunning, job_runner
+from app.services.scheduler import scheduler
 from contextlib import asynccontextmanager
 
+logging.basicConfig(level=settings.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    views.static_assets.load()
+    views.shells.prerender(views.SHELLS)
     db.connect()
+    await db.warm_up(settings.MONGO_WARMUP_CONNECTIONS)
+    database = await get_database()
+    # Duplicate-account protection depends on the unique indexes; refuse to start without them
+    if settings.ENSURE_INDEXES_ON_STARTUP:
+        await ensure_indexes(database)
+        await search_service.backfill_search_tokens(database)
+    else:
+        await verify_unique_indexes(database)
+    # Dashboards read member_summaries; build them in the background after an upgrade
+    if await summary_service.summaries_need_rebuild(database):
+        try:
+            await job_runner.enqueue(database, "rebuild_summaries", actor_id="SYSTEM")
+        except JobAlreadyRunning:
+            pass  # Another worker is already rebuilding
+    # Versions must be loaded before the first conditional GET is answered
+    await cache_versions.sync(database)
+    cache_versions.start(database)
+    # Likewise revocations before the first access token is accepted
+    await revocations.sync(database)
+    revocations.start(database)
+    audit_sink.start()
+    if settings.SCHEDULER_ENABLED:
+        scheduler.start(database)
     yield
     # Shutdown
+    await scheduler.stop()
+    await job_runner.shutdown()
+    await audit_sink.stop()
+    await cache_versions.stop()
+    await revocations.stop()
+    password_hasher.shutdown()
     db.close()
 
 app = FastAPI(
@@ -18,19 +65,53 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+# Added last so it wraps GZip and times responses including compression
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE)
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Fingerprinted, precompressed files held in memory (see app/core/assets.py)
+app.mount("/static", views.static_assets, name="static")
+
+@app.exception_handler(ExecutionTimeout)
+async def query_timeout_handler(request, exc):
+    # An interactive query ran past MONGO_INTERACTIVE_MAX_TIME_MS
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "The query took too long, please narrow it or try again"},
+        headers={"Retry-After": "5"},
+    )
 
-app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["authentication"])
-app.include_router(admin.router, prefix=f"{settings.API_V1_STR}/admin", tags=["admin"])
-app.include_router(contributions.router, prefix=f"{settings.API_V1_STR}/contributions", tags=["contributions"])
-app.include_router(welfare.router, prefix=f"{settings.API_V1_STR}/welfare", tags=["welfare"])
-app.include_router(views.router, tags=["views"])
+def include_router(router, prefix: str = "", **kwargs):
+    app.include_router(router, prefix=prefix, **kwargs)
+    metrics.label_routes(router, prefix)
+
+include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["authentication"])
+include_router(admin.router, prefix=f"{settings.API_V1_STR}/admin", tags=["admin"])
+include_router(contributions.router, prefix=f"{settings.API_V1_STR}/contributions", tags=["contributions"])
+include_router(welfare.router, prefix=f"{settings.API_V1_STR}/welfare", tags=["welfare"])
+include_router(reports.router, prefix=f"{settings.API_V1_STR}/reports", tags=["reports"])
+include_router(exports.router, prefix=f"{settings.API_V1_STR}/exports", tags=["exports"])
+include_router(views.router, tags=["views"])
 
 @app.get("/health")
 async def health_check():
     try:
         # Ping database
         await db.client.admin.command('ping')
-        return {"status": "ok", "db": "connected"}
+        return {
+            "status": "ok",
+            "db": "connected",
+            "db_pool": db.pool_stats(),
+            "user_cache": user_cache.stats(),
+            "audit": audit_sink.stats(),
+            "password_hasher": password_hasher.stats(),
+            "rate_limits": rate_limiter.stats(),
+            "token_revocations": revocations.stats(),
+        }
     except Exception as e:
         return {"status": "error", "db": str(e)}
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,173 @@
+"""
+Declarative registry of the indexes each collection needs, applied idempotently at startup.
+
+Run `python -m app.models.indexes` to apply them by hand, or
+`python -m app.models.indexes --report` to list missing, undeclared and unused indexes.
+"""
+import asyncio
+import logging
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import OperationFailure
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: str
+    keys: List[Tuple[str, int]]
+    name: str
+    unique: bool = False
+    options: Dict = field(default_factory=dict)
+
+INDEXES: List[IndexSpec] = [
+    # Login, token lookups, and duplicate protection for register/create_member
+    IndexSpec("users", [("email", 1)], "email_unique", unique=True),
+    # Admin member search, see app/services/search_service.py
+    IndexSpec("users", [("search_tokens", 1)], "search_tokens"),
+    # Monthly generation: active members
+    IndexSpec("users", [("role", 1), ("is_active", 1)], "role_active"),
+
+    # One due per member per period; also serves a member's own listing
+    IndexSpec("contributions", [("user_id", 1), ("year", 1), ("month", 1)], "user_period_unique", unique=True),
+    # Monthly generation: existing records for the period
+    IndexSpec("contributions", [("year", 1), ("month", 1)], "period"),
+    # Late-marking and reminders
+    IndexSpec("contributions", [("status", 1), ("due_date", 1)], "status_due_date"),
+
+    # Admin payments listing, filtered by status, newest first
+    IndexSpec("transactions", [("status", 1), ("_id", -1)], "status_id"),
+    IndexSpec("transactions", [("user_id", 1), ("_id", -1)], "user_id"),
+
+    # Member's own requests and the admin listing
+    IndexSpec("welfare", [("user_id", 1), ("_id", -1)], "user_id"),
+    IndexSpec("welfare", [("status", 1), ("_id", -1)], "status_id"),
+
+    IndexSpec("audit_logs", [("created_at", -1)], "created_at"),
+    IndexSpec("audit_logs", [("target_id", 1), ("created_at", -1)], "target_created_at"),
+
+    # Organisation summary, newest period first
+    IndexSpec("period_summaries", [("year", -1), ("month", -1)], "period"),
+
+    IndexSpec("jobs", [("kind", 1), ("status", 1)], "kind_status"),
+    # One queued or running job per kind across all workers; `active` is unset when it finishes
+    IndexSpec(
+        "jobs", [("kind", 1)], "kind_active_unique", unique=True,
+        options={"partialFilterExpression": {"active": True}},
+    ),
+    IndexSpec("scheduler_runs", [("started_at", -1)], "started_at"),
+    # Unfinished runs with a lapsed lease, see Scheduler._recover
+    IndexSpec("scheduler_runs", [("lease_until", 1)], "lease_until"),
+
+    # Incremental sync of ETag versions, see app/core/http_cache.py
+    IndexSpec("cache_versions", [("updated_at", 1)], "updated_at"),
+
+    # Expires stored responses, see app/core/idempotency.py
+    IndexSpec(
+        "idempotency_keys", [("created_at", 1)], "created_at_ttl",
+        options={"expireAfterSeconds": settings.IDEMPOTENCY_KEY_TTL_SECONDS},
+    ),
+
+    # Refresh tokens: revoking a member deletes theirs; expired ones are dropped
+    IndexSpec("refresh_tokens", [("user_id", 1)], "user_id"),
+    IndexSpec("refresh_tokens", [("expires_at", 1)], "expires_at_ttl", options={"expireAfterSeconds": 0}),
+    # Incremental sync of revoked members, see app/core/tokens.py; entries outlive access tokens only
+    IndexSpec("token_revocations", [("updated_at", 1)], "updated_at"),
+    IndexSpec("token_revocations", [("expires_at", 1)], "expires_at_ttl", options={"expireAfterSeconds": 0}),
+
+    # Drops idle token buckets once they would be full again, see app/core/rate_limit.py
+    IndexSpec("rate_limits", [("expires_at", 1)], "expires_at_ttl", options={"expireAfterSeconds": 0}),
+]
+
+def _collections() -> List[str]:
+    return sorted({spec.collection for spec in INDEXES})
+
+class MissingUniqueIndex(RuntimeError):
+    """
+    A unique index is absent. register_user and create_member rely on these alone to
+    reject duplicates, so the app must not serve requests without them.
+    """
+
+async def ensure_indexes(db: AsyncIOMotorDatabase, strict: bool = True) -> List[dict]:
+    """
+    Creates every declared index. Already-existing indexes are a no-op on the server.
+    A failure (e.g. duplicate data blocking a unique index) is logged and reported
+    without stopping the remaining indexes; with `strict`, a failed unique index then
+    raises MissingUniqueIndex.
+    """
+    results = []
+    for spec in INDEXES:
+        try:
+            await db[spec.collection].create_index(
+                spec.keys, name=spec.name, unique=spec.unique, **spec.options
+            )
+            results.append({"collection": spec.collection, "name": spec.name, "status": "ok"})
+        except OperationFailure as e:
+            logger.error("Could not create index %s.%s: %s", spec.collection, spec.name, e)
+            results.append({"collection": spec.collection, "name": spec.name, "status": "error", "error": str(e)})
+
+    unique = {(spec.collection, spec.name) for spec in INDEXES if spec.unique}
+    failed = [r for r in results if r["status"] == "error" and (r["collection"], r["name"]) in unique]
+    if strict and failed:
+        raise MissingUniqueIndex(
+            "Could not create unique indexes: "
+            + "; ".join(f"{r['collection']}.{r['name']}: {r['error']}" for r in failed)
+        )
+    return results
+
+async def verify_unique_indexes(db: AsyncIOMotorDatabase) -> None:
+    """
+    Raises MissingUniqueIndex unless every declared unique index exists, for startups
+    that skip ensure_indexes.
+    """
+    missing = []
+    for spec in INDEXES:
+        if spec.unique and spec.name not in await db[spec.collection].index_information():
+            missing.append(f"{spec.collection}.{spec.name}")
+    if missing:
+        raise MissingUniqueIndex(
+            f"Unique indexes missing: {', '.join(missing)}; run `python -m app.models.indexes`"
+        )
+
+async def index_report(db: AsyncIOMotorDatabase) -> Dict[str, dict]:
+    """
+    Per collection: declared indexes that are missing, existing indexes that are not
+    declared, and indexes with no recorded use since the server last restarted.
+    """
+    report = {}
+    for collection in _collections():
+        declared = {spec.name: spec for spec in INDEXES if spec.collection == collection}
+        existing = await db[collection].index_information()
+
+        usage = {}
+        async for stat in db[collection].aggregate([{"$indexStats": {}}]):
+            usage[stat["name"]] = stat["accesses"]["ops"]
+
+        report[collection] = {
+            "missing": sorted(name for name in declared if name not in existing),
+            "undeclared": sorted(name for name in existing if name not in declared and name != "_id_"),
+            "unused": sorted(name for name, ops in usage.items() if ops == 0 and name != "_id_"),
+            "usage": usage,
+        }
+    return report
+
+async def _main(argv: List[str]):
+    from app.db.mongodb import db, get_database
+
+    db.connect()
+    try:
+        database = await get_database()
+        if "--report" in argv:
+            for collection, details in (await index_report(database)).items():
+                print(collection, details)
+        else:
+            for result in await ensure_indexes(database, strict=False):
+                print(result)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    asyncio.run(_main(sys.argv[1:]))
@@ -0,0 +1,35 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from enum import Enum
+from datetime import datetime
+from bson import ObjectId
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+class JobCreate(BaseModel):
+    kind: str
+    created_by: str
+    status: JobStatus = JobStatus.QUEUED
+    processed: int = 0
+    total: Optional[int] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    # Set while queued or running; see the kind_active_unique index
+    active: Optional[bool] = True
+    heartbeat_at: datetime = Field(default_factory=datetime.utcnow)
+
+class JobInDB(JobCreate):
+    id: Optional[str] = Field(alias="_id", default=None)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+
+    class Config:
+        populate_by_name = True
+        arbitrary_types_allowed = True
+        json_encoders = {ObjectId: str}
@@ -0,0 +1,40 @@
+from pydantic import BaseModel, Field, computed_field
+from typing import List, Optional
+from datetime import datetime
+
+class SummaryTotals(BaseModel):
+    total_due: float = 0.0
+    total_paid: float = 0.0
+    count_pending: int = 0
+    count_late: int = 0
+    count_paid: int = 0
+    # Unpaid part of Pending and Late dues; total_due - total_paid would also count
+    # Waived dues and any over- or underpayment of settled ones
+    balance_due: float = 0.0
+
+    @computed_field
+    @property
+    def outstanding(self) -> float:
+        return self.balance_due
+
+class MemberSummary(SummaryTotals):
+    user_id: str = Field(alias="_id")
+    score: int = 0
+    streak: int = 0  # consecutive dues settled on time
+    last_paid_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        populate_by_name = True
+
+class PeriodSummary(SummaryTotals):
+    id: str = Field(alias="_id")  # "YYYY-MM"
+    year: int
+    month: int
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        populate_by_name = True
+
+class OrganisationSummary(SummaryTotals):
+    periods: List[PeriodSummary] = []
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 from datetime import datetime
 from bson import ObjectId
@@ -37,3 +37,7 @@ class TransactionInDB(TransactionBase):
         populate_by_name = True
         arbitrary_types_allowed = True
         json_encoders = {ObjectId: str}
+
+class TransactionBulkVerify(BaseModel):
+    transaction_ids: List[str] = Field(..., min_length=1, max_length=500)
+    action: str = Field(..., pattern="^(approve|reject)$")
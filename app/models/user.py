@@ -49,6 +49,18 @@ class UserUpdate(BaseModel):
     role: Optional[Role] = None
     password: Optional[str] = None
 
+class Principal(BaseModel):
+    """
+    The authenticated caller, as carried in access token claims.
+    """
+    id: str
+    email: str
+    role: Role
+    is_active: bool = True
+
+class TokenRefresh(BaseModel):
+    refresh_token: str
+
 class UserInDB(UserBase):
     id: Optional[str] = Field(alias="_id", default=None)
     hashed_password: str
@@ -1,73 +1,93 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from app.core import deps, security
-from app.models.user import UserInDB, UserUpdate, UserBase, UserCreate, Role
-from app.db.mongodb import get_database
+from typing import Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from app.core import deps, http_cache, security
+from app.core.codec import codec_for, document_response, page_response
+from app.core.config import settings
+from app.core.pagination import Page, PageParams, paginate
+from app.core.tokens import revocations
+from app.core.user_cache import user_cache
+from app.models.user import Principal, UserInDB, UserUpdate, UserBase, UserCreate, Role
+from app.db.mongodb import get_database, secondary_reads
+from app.models.indexes import index_report
+from app.models.job import JobInDB
+from app.models.summary import OrganisationSummary, PeriodSummary
+from app.services import import_service, job_service, member_service, report_service, search_service
+from app.services.scheduler import scheduler
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
 from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
 router = APIRouter()
 
-@router.get("/members", response_model=List[UserInDB])
+@router.get("/members", response_model=Page[UserInDB])
 async def list_members(
-    skip: int = 0,
-    limit: int = 100,
     search: Optional[str] = None,
-    current_user: UserInDB = Depends(deps.get_current_admin_user),
+    params: PageParams = Depends(),
+    current_user: Principal = Depends(deps.get_current_admin_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
-    query = {}
-    if search:
-        query = {
-            "$or": [
-                {"full_name": {"$regex": search, "$options": "i"}},
-                {"email": {"$regex": search, "$options": "i"}},
-                {"phone": {"$regex": search, "$options": "i"}}
-            ]
-        }
-    
-    users_cursor = db.users.find(query).skip(skip).limit(limit)
-    users = await users_cursor.to_list(length=limit)
-    
-    # Fix ObjectId serialization
-    results = []
-    for user in users:
-        if "_id" in user:
-            user["_id"] = str(user["_id"])
-        results.append(UserInDB(**user))
-        
-    return results
+    if search and search.strip():
+        # Ranked results come back as a single page
+        users = await search_service.search_members(db, search, params.limit)
+        next_cursor, total = None, len(users)
+    else:
+        # Newest first; _id order follows insertion time
+        users, next_cursor, total = await paginate(
+            secondary_reads(db.users), {}, [("_id", -1)], params, projection=codec_for(UserInDB).projection
+        )
+
+    return page_response(users, UserInDB, next_cursor, total)
 
 @router.post("/members", response_model=UserInDB)
 async def create_member(
     user_in: UserCreate,
-    current_user: UserInDB = Depends(deps.get_current_admin_user),
+    current_user: Principal = Depends(deps.get_current_admin_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
-    user = await db.users.find_one({"email": user_in.email})
-    if user:
-        raise HTTPException(
-            status_code=400,
-            detail="User with this email already exists",
-        )
-    
     user_data = user_in.dict()
-    hashed_password = security.get_password_hash(user_in.password)
+    hashed_password = await security.hash_password(user_in.password)
     del user_data["password"]
     user_data["hashed_password"] = hashed_password
+    user_data["search_tokens"] = search_service.search_tokens_for(user_data)
     
-    new_user = await db.users.insert_one(user_data)
-    created_user = await db.users.find_one({"_id": new_user.inserted_id})
-    created_user["_id"] = str(created_user["_id"])
-    
-    return UserInDB(**created_user)
+    # The unique email index rejects duplicates, including concurrent creates
+    try:
+        await db.users.insert_one(user_data)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=400,
+            detail="User with this email already exists",
+        )
+    # insert_one stored exactly user_data and set its _id
+    return document_response(user_data, UserInDB)
+
+@router.post("/members/import", status_code=202)
+async def import_members(
+    file: UploadFile = File(...),
+    current_user: Principal = Depends(deps.get_current_admin_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Creates members in bulk from a CSV (header row) or JSON array upload.
+    The file is checked here and imported by a background job; poll the job for
+    progress and its per-row report (created, invalid or duplicate). Valid rows
+    are imported even when others fail.
+    """
+    try:
+        rows = import_service.parse_rows(await file.read(), file.filename, file.content_type)
+    except import_service.ImportFileError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return await job_service.enqueue_or_conflict(
+        db, "import_members", current_user.id, params={"rows": rows, "filename": file.filename}
+    )
 
 @router.put("/members/{user_id}", response_model=UserInDB)
 async def update_member(
     user_id: str,
     user_in: UserUpdate,
-    current_user: UserInDB = Depends(deps.get_current_admin_user),
+    current_user: Principal = Depends(deps.get_current_admin_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     if not ObjectId.is_valid(user_id):
@@ -79,23 +99,36 @@ async def update_member(
         
     update_data = user_in.dict(exclude_unset=True)
     if "password" in update_data and update_data["password"]:
-        hashed_password = security.get_password_hash(update_data["password"])
+        hashed_password = await security.hash_password(update_data["password"])
         update_data["hashed_password"] = hashed_password
         del update_data["password"]
+
+    if any(field in update_data for field in search_service.SEARCH_FIELDS):
+        update_data["search_tokens"] = search_service.search_tokens_for({**user, **update_data})
         
-    updated_user = await db.users.find_one_and_update(
-        {"_id": ObjectId(user_id)},
-        {"$set": update_data},
-        return_document=ReturnDocument.AFTER
-    )
+    try:
+        updated_user = await db.users.find_one_and_update(
+            {"_id": ObjectId(user_id)},
+            {"$set": update_data},
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="User with this email already exists")
+    report_service.invalidate("users")
+    # Drop both the old and (possibly changed) new email from the auth cache
+    user_cache.invalidate(user["email"])
+    user_cache.invalidate_id(user_id)
+    await http_cache.bump(db, [user_id], http_cache.ME)
+    # Access tokens carry the role and email; make the member sign in again to pick up the change
+    if any(field in update_data for field in ("role", "email", "hashed_password")):
+        await revocations.revoke(db, user_id)
     
-    updated_user["_id"] = str(updated_user["_id"])
-    return UserInDB(**updated_user)
+    return document_response(updated_user, UserInDB)
 
 @router.delete("/members/{user_id}", response_model=dict)
 async def deactivate_member(
     user_id: str,
-    current_user: UserInDB = Depends(deps.get_current_admin_user),
+    current_user: Principal = Depends(deps.get_current_admin_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     # Instead of deleting, we might want to just deactivate
@@ -106,43 +139,103 @@ async def deactivate_member(
         {"_id": ObjectId(user_id)},
         {"$set": {"is_active": False}}
     )
+    user_cache.invalidate_id(user_id)
+    await revocations.revoke(db, user_id)
     
     return {"status": "success", "message": "Member deactivated"}
 
-@router.post("/trigger-reminders", dependencies=[Depends(deps.get_current_admin_user)])
+@router.post("/trigger-reminders", status_code=202, dependencies=[Depends(deps.get_current_admin_user)])
 async def trigger_reminders(
-    current_user: UserInDB = Depends(deps.get_current_admin_user)
+    current_user: Principal = Depends(deps.get_current_admin_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    return await job_service.enqueue_or_conflict(db, "send_reminders", current_user.id)
+
+@router.get("/jobs/{job_id}", response_model=JobInDB)
+async def get_job(
+    job_id: str,
+    current_user: Principal = Depends(deps.get_current_admin_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
 ):
-    from app.services import notification_service
-    count = await notification_service.send_reminders()
-    return {"message": f"Reminders triggered for {count} members"}
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid Job ID")
 
-@router.get("/transactions", response_model=List[dict])
+    job = await db.jobs.find_one({"_id": ObjectId(job_id)})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return document_response(job, JobInDB)
+
+@router.get("/scheduler", response_model=dict)
+async def get_scheduler_status(
+    limit: int = Query(20, le=100),
+    current_user: Principal = Depends(deps.get_current_admin_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Upcoming scheduled runs in this worker, plus recent run history across all workers.
+    """
+    cursor = db.scheduler_runs.find().sort("started_at", -1).limit(limit)
+    return {
+        "enabled": settings.SCHEDULER_ENABLED,
+        "upcoming": scheduler.next_runs(),
+        "history": await cursor.to_list(length=limit),
+    }
+
+@router.get("/summary", response_model=OrganisationSummary)
+async def get_organisation_summary(
+    year: Optional[int] = None,
+    current_user: Principal = Depends(deps.get_current_admin_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Collected vs. outstanding dues per period, with organisation-wide totals.
+    """
+    query = {"year": year} if year else {}
+    periods = [
+        PeriodSummary(**p)
+        async for p in secondary_reads(db.period_summaries).find(query).sort([("year", -1), ("month", -1)])
+    ]
+    totals = {
+        field: sum(getattr(p, field) for p in periods)
+        for field in ("total_due", "total_paid", "count_pending", "count_late", "count_paid", "balance_due")
+    }
+    return OrganisationSummary(periods=periods, **totals)
+
+@router.post("/summary/rebuild", status_code=202)
+async def trigger_summary_rebuild(
+    current_user: Principal = Depends(deps.get_current_admin_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Recompute all member and period summaries from contributions (backfill/repair).
+    """
+    return await job_service.enqueue_or_conflict(db, "rebuild_summaries", current_user.id)
+
+@router.get("/indexes", response_model=dict)
+async def get_index_report(
+    current_user: Principal = Depends(deps.get_current_admin_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Declared indexes that are missing, undeclared indexes, and indexes with no recorded use.
+    """
+    return await index_report(db)
+
+@router.get("/transactions", response_model=Page[dict])
 async def list_transactions(
     status: Optional[str] = None,
-    current_user: UserInDB = Depends(deps.get_current_admin_user),
+    params: PageParams = Depends(),
+    current_user: Principal = Depends(deps.get_current_admin_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     query = {}
     if status:
         query["status"] = status
         
-    cursor = db.transactions.find(query).sort("created_at", -1)
-    transactions = await cursor.to_list(length=100)
-    
-    # Enrich with user details (email) for UI display
-    # This is a basic N+1 approximation, better to use aggregation in real prod
-    results = []
-    for tx in transactions:
-        tx["_id"] = str(tx["_id"])
-        if tx.get("user_id"):
-            try:
-                user = await db.users.find_one({"_id": ObjectId(tx["user_id"])})
-                if user:
-                    tx["user_email"] = user.get("email")
-                    tx["user_full_name"] = user.get("full_name")
-            except:
-                pass
-        results.append(tx)
-        
-    return results
+    # Newest first; _id order follows insertion time
+    transactions, next_cursor, total = await paginate(secondary_reads(db.transactions), query, [("_id", -1)], params)
+
+    # Enrich with user details (email) for UI display in one batched lookup
+    await member_service.attach_member_fields(db, transactions)
+    return page_response(transactions, None, next_cursor, total)
@@ -1,16 +1,19 @@
-from datetime import timedelta
 from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from app.core import security, deps
-from app.core.config import settings
-from app.models.user import UserCreate, UserInDB, UserBase
+from app.core import http_cache, rate_limit, security, deps, tokens
+from app.core.codec import document_response
+from app.models.user import Principal, TokenRefresh, UserCreate, UserInDB, UserBase
+from app.core.user_cache import user_cache
 from app.db.mongodb import get_database
+from app.services import search_service
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 
 router = APIRouter()
 
-@router.post("/login", response_model=dict)
+@router.post("/login", response_model=dict, dependencies=[Depends(rate_limit.limit_login)])
 async def login_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: AsyncIOMotorDatabase = Depends(get_database)
@@ -19,19 +22,25 @@ async def login_access_token(
     OAuth2 compatible token login, get an access token for future requests.
     """
     user = await db.users.find_one({"email": form_data.username})
-    if not user or not security.verify_password(form_data.password, user["hashed_password"]):
+    if not user:
+        await rate_limit.record_failed_login(db, form_data.username)
         raise HTTPException(status_code=400, detail="Incorrect email or password")
+
+    valid, new_hash = await security.verify_and_update_password(form_data.password, user["hashed_password"])
+    if not valid:
+        await rate_limit.record_failed_login(db, form_data.username)
+        raise HTTPException(status_code=400, detail="Incorrect email or password")
+    if new_hash:
+        # Stored hash uses an outdated work factor
+        await db.users.update_one({"_id": user["_id"]}, {"$set": {"hashed_password": new_hash}})
+        user_cache.invalidate(user["email"])
+        await http_cache.bump(db, [str(user["_id"])], http_cache.ME)
     
     if not user.get("is_active", True):
          raise HTTPException(status_code=400, detail="Inactive user")
 
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = security.create_access_token(
-        data={"sub": user["email"], "role": user.get("role")}, expires_delta=access_token_expires
-    )
     return {
-        "access_token": access_token,
-        "token_type": "bearer",
+        **await tokens.issue_tokens(db, user),
         "user": {
             "email": user["email"],
             "full_name": user["full_name"],
@@ -40,14 +49,55 @@ async def login_access_token(
         }
     }
 
+@router.post("/refresh", response_model=dict)
+async def refresh_access_token(
+    body: TokenRefresh,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+) -> Any:
+    """
+    Exchange a refresh token for a new access token and refresh token.
+    The presented refresh token is used up.
+    """
+    user = await tokens.redeem_refresh_token(db, body.refresh_token)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await tokens.issue_tokens(db, user)
+
+@router.post("/logout", response_model=dict)
+async def logout(
+    body: TokenRefresh,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+) -> Any:
+    """
+    Discard a refresh token. The access token lapses on its own shortly after.
+    """
+    await tokens.discard_refresh_token(db, body.refresh_token)
+    return {"status": "success"}
+
 @router.get("/me", response_model=UserInDB)
-async def read_users_me(current_user: UserInDB = Depends(deps.get_current_active_user)):
+async def read_users_me(
+    request: Request,
+    current_user: Principal = Depends(deps.get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
     """
     Get current user details.
     """
-    return current_user
+    async def build():
+        # Not user_cache: it may predate a change made on another worker, and the
+        # body is tagged with the version counter current before this read
+        user = await db.users.find_one({"_id": ObjectId(current_user.id)})
+        if user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        return document_response(user, UserInDB)
 
-@router.post("/register", response_model=UserBase)
+    return await http_cache.conditional_get(request, current_user.id, http_cache.ME, build)
+
+@router.post("/register", response_model=UserBase, dependencies=[Depends(rate_limit.limit_register)])
 async def register_user(
     user_in: UserCreate,
     db: AsyncIOMotorDatabase = Depends(get_database)
@@ -56,22 +106,19 @@ async def register_user(
     Create new user without the need to be logged in (Open registration).
     For a closed system, this might be restricted to Admins.
     """
-    user = await db.users.find_one({"email": user_in.email})
-    if user:
-        raise HTTPException(
-            status_code=400,
-            detail="The user with this username already exists in the system",
-        )
-    
     user_data = user_in.dict()
-    hashed_password = security.get_password_hash(user_in.password)
+    hashed_password = await security.hash_password(user_in.password)
     del user_data["password"]
     user_data["hashed_password"] = hashed_password
+    user_data["search_tokens"] = search_service.search_tokens_for(user_data)
     
-    new_user = await db.users.insert_one(user_data)
-    created_user = await db.users.find_one({"_id": new_user.inserted_id})
-    
-    if "_id" in created_user:
-        created_user["_id"] = str(created_user["_id"])
-        
-    return UserBase(**created_user)
+    # The unique email index rejects duplicates, including concurrent registrations
+    try:
+        await db.users.insert_one(user_data)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=400,
+            detail="The user with this username already exists in the system",
+        )
+    # insert_one stored exactly user_data and set its _id
+    return document_response(user_data, UserBase)
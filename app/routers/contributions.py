@@ -1,56 +1,86 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
-from app.core import deps
-from app.models.user import UserInDB, Role
-from app.models.contribution import ContributionInDB, ContributionUpdate, ContributionStatus
-from app.models.transaction import TransactionInDB, TransactionCreate, TransactionStatus
-from app.services import contribution_service, audit_service
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, Query, Request, UploadFile, File
+from app.core import deps, http_cache, rate_limit
+from app.core.codec import DocumentResponse, document_response, page_response
+from app.core.idempotency import fingerprint, run_idempotent
+from app.core.pagination import Page, PageParams, paginate
+from app.models.user import Principal, Role
+from app.models.contribution import ContributionInDB, ContributionUpdate
+from app.models.summary import MemberSummary
+from app.models.transaction import TransactionInDB, TransactionCreate, TransactionBulkVerify
+from app.services import job_service, payment_service, report_service
 from app.db.mongodb import get_database
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
-from datetime import datetime
 
 router = APIRouter()
 
 # --- Contribution Endpoints ---
 
-@router.post("/generate-monthly", dependencies=[Depends(deps.get_current_admin_user)])
+@router.post("/generate-monthly", status_code=202, dependencies=[Depends(deps.get_current_admin_user)])
 async def trigger_monthly_generation(
-    current_user: UserInDB = Depends(deps.get_current_admin_user),
+    current_user: Principal = Depends(deps.get_current_admin_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """
     Admin Trigger: Generate monthly dues for all members manually.
+    Runs in the background; poll GET /admin/jobs/{job_id} for progress.
     """
-    await contribution_service.generate_monthly_contributions(db)
-    await audit_service.log_action(
-        actor_id=current_user.id,
-        action="GENERATE_CONTRIBUTIONS",
-        resource="contributions",
-        details={"status": "success"}
-    )
-    return {"message": "Monthly contribution generation triggered successfully"}
+    return await job_service.enqueue_or_conflict(db, "generate_monthly", current_user.id)
 
-@router.get("/my-contributions", response_model=List[ContributionInDB])
+@router.post("/mark-late", status_code=202, dependencies=[Depends(deps.get_current_admin_user)])
+async def trigger_late_marking(
+    current_user: Principal = Depends(deps.get_current_admin_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Admin Trigger: Mark overdue Pending contributions as Late.
+    """
+    return await job_service.enqueue_or_conflict(db, "mark_late", current_user.id)
+
+@router.get("/my-contributions", response_model=Page[ContributionInDB])
 async def get_my_contributions(
-    current_user: UserInDB = Depends(deps.get_current_active_user),
+    request: Request,
+    params: PageParams = Depends(),
+    current_user: Principal = Depends(deps.get_current_active_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
-    cursor = db.contributions.find({"user_id": current_user.id}).sort([("year", -1), ("month", -1)])
-    contributions = await cursor.to_list(length=100)
-    
-    results = []
-    for c in contributions:
-        c["_id"] = str(c["_id"])
-        results.append(ContributionInDB(**c))
-    return results
+    async def build():
+        # Primary: a member reading back their own writes may be served by any worker
+        contributions, next_cursor, total = await paginate(
+            db.contributions,
+            {"user_id": current_user.id},
+            [("year", -1), ("month", -1), ("_id", -1)],
+            params,
+        )
+        return page_response(contributions, ContributionInDB, next_cursor, total)
+
+    return await http_cache.conditional_get(request, current_user.id, http_cache.CONTRIBUTIONS, build)
+
+@router.get("/summary", response_model=MemberSummary)
+async def get_my_summary(
+    request: Request,
+    current_user: Principal = Depends(deps.get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Dashboard totals for the current member, from the maintained member summary.
+    """
+    async def build():
+        summary = await db.member_summaries.find_one({"_id": current_user.id})
+        if not summary:
+            user = await db.users.find_one({"_id": ObjectId(current_user.id)}, {"contribution_score": 1})
+            summary = {"_id": current_user.id, "score": (user or {}).get("contribution_score", 0)}
+        return DocumentResponse(MemberSummary(**summary).model_dump(by_alias=True))
+
+    return await http_cache.conditional_get(request, current_user.id, http_cache.CONTRIBUTIONS, build)
 
 # --- Payment/Transaction Endpoints ---
 
-@router.post("/pay", response_model=TransactionInDB)
+@router.post("/pay", response_model=TransactionInDB, dependencies=[Depends(rate_limit.limit_member_write)])
 async def submit_payment(
     transaction: TransactionCreate,
-    current_user: UserInDB = Depends(deps.get_current_active_user),
+    current_user: Principal = Depends(deps.get_current_active_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """
@@ -61,89 +91,46 @@ async def submit_payment(
     
     # Save Transaction
     tx_data = transaction.dict()
-    new_tx = await db.transactions.insert_one(tx_data)
-    
-    created_tx = await db.transactions.find_one({"_id": new_tx.inserted_id})
-    created_tx["_id"] = str(created_tx["_id"])
-    
-    return TransactionInDB(**created_tx)
+    await db.transactions.insert_one(tx_data)
+    report_service.invalidate("transactions")
+    await http_cache.bump(db, [current_user.id], http_cache.CONTRIBUTIONS)
+
+    # insert_one stored exactly tx_data and set its _id
+    return document_response(tx_data, TransactionInDB)
+
+@router.post("/verify-payments", dependencies=[Depends(deps.get_current_admin_user)])
+async def verify_payments(
+    request: TransactionBulkVerify,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: Principal = Depends(deps.get_current_admin_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Approve or reject many pending transactions in one call.
+    Returns an outcome per transaction; ids that are not Pending are skipped.
+    """
+    return await run_idempotent(
+        db, idempotency_key, current_user.id,
+        fingerprint("verify-payments", request.transaction_ids, request.action),
+        lambda: payment_service.verify_payments(
+            db, request.transaction_ids, request.action == "approve", current_user.id
+        ),
+    )
 
 @router.post("/verify-payment/{transaction_id}", dependencies=[Depends(deps.get_current_admin_user)])
 async def verify_payment(
     transaction_id: str,
     action: str = Query(..., regex="^(approve|reject)$"),
-    current_user: UserInDB = Depends(deps.get_current_admin_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: Principal = Depends(deps.get_current_admin_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
-    if not ObjectId.is_valid(transaction_id):
-        raise HTTPException(status_code=400, detail="Invalid ID")
-
-    tx = await db.transactions.find_one({"_id": ObjectId(transaction_id)})
-    if not tx:
-        raise HTTPException(status_code=404, detail="Transaction not found")
-
-    new_status = TransactionStatus.VERIFIED if action == "approve" else TransactionStatus.REJECTED
-    
-    await db.transactions.update_one(
-        {"_id": ObjectId(transaction_id)},
-        {
-            "$set": {
-                "status": new_status,
-                "verified_by": current_user.id,
-                "verified_at": datetime.utcnow()
-            }
-        }
-    )
-
-    # Audit Log
-    await audit_service.log_action(
-        actor_id=current_user.id,
-        action=f"PAYMENT_{action.upper()}",
-        resource="transactions",
-        target_id=transaction_id,
-        details={"amount": tx["amount"], "method": tx["payment_method"]}
+    """
+    Only a Pending transaction can be verified or rejected; a repeat returns 409,
+    or the original response when the same Idempotency-Key is sent.
+    """
+    return await run_idempotent(
+        db, idempotency_key, current_user.id,
+        fingerprint("verify-payment", transaction_id, action),
+        lambda: payment_service.verify_payment(db, transaction_id, action == "approve", current_user.id),
     )
-
-    # If approved, update the Contribution record status
-    if new_status == TransactionStatus.VERIFIED and tx.get("contribution_id"):
-        contribution = await db.contributions.find_one({"_id": ObjectId(tx["contribution_id"])})
-        
-        await db.contributions.update_one(
-            {"_id": ObjectId(tx["contribution_id"])},
-            {
-                "$set": {
-                    "status": ContributionStatus.PAID,
-                    "amount_paid": tx["amount"],
-                    "paid_at": datetime.utcnow()
-                }
-            }
-        )
-        
-        # --- Update Contribution Score ---
-        points = 0
-        if contribution:
-            paid_at = datetime.utcnow()
-            # Ensure due_date is naive or aware consistent (MongoDB stores naive UTC usually)
-            due_date = contribution["due_date"] 
-            
-            if paid_at <= due_date:
-                points = 10 # On Time
-            else:
-                points = 5 # Late but paid
-                
-            # Update User Score
-            await db.users.update_one(
-                {"_id": ObjectId(tx["user_id"])},
-                {"$inc": {"contribution_score": points}}
-            )
-            
-            # Log Score Update
-            await audit_service.log_action(
-                actor_id=current_user.id,
-                action="UPDATE_SCORE",
-                resource="users",
-                target_id=tx["user_id"],
-                details={"points_added": points, "reason": "Payment Verified"}
-            )
-    
-    return {"message": f"Payment {action}d successfully"}
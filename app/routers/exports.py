@@ -0,0 +1,102 @@
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator, Optional
+from bson import ObjectId
+from fastapi import APIRouter, Depends
+from app.core import deps
+from app.core.config import settings
+from app.core.streaming import csv_response, ndjson_response
+from app.db.mongodb import get_database, secondary_reads
+from app.models.contribution import ContributionStatus
+from app.models.transaction import TransactionStatus
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+
+router = APIRouter(dependencies=[Depends(deps.get_current_auditor_user)])
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+MEMBER_FIELDS = ["_id", "email", "full_name", "phone", "graduation_year", "role", "is_active", "contribution_score"]
+CONTRIBUTION_FIELDS = ["_id", "user_id", "year", "month", "amount_due", "amount_paid", "status", "due_date", "paid_at"]
+TRANSACTION_FIELDS = [
+    "_id", "user_id", "contribution_id", "amount", "payment_method", "reference_number",
+    "proof_url", "status", "remarks", "verified_by", "verified_at",
+]
+AUDIT_LOG_FIELDS = ["_id", "created_at", "actor_id", "action", "target_resource", "target_id", "details"]
+
+def _id_range(date_from: Optional[datetime], date_to: Optional[datetime]) -> dict:
+    """
+    Creation-time filter on _id, which every collection has indexed.
+    """
+    bounds = {}
+    if date_from:
+        bounds["$gte"] = ObjectId.from_datetime(date_from)
+    if date_to:
+        bounds["$lt"] = ObjectId.from_datetime(date_to)
+    return {"_id": bounds} if bounds else {}
+
+async def _iter_documents(collection: AsyncIOMotorCollection, query: dict, fields: list) -> AsyncIterator[dict]:
+    projection = {field: 1 for field in fields}
+    cursor = secondary_reads(collection).find(query, projection).sort("_id", 1).batch_size(settings.EXPORT_BATCH_SIZE)
+    async for doc in cursor:
+        yield doc
+
+def _export(collection: AsyncIOMotorCollection, query: dict, fields: list, format: ExportFormat, name: str):
+    rows = _iter_documents(collection, query, fields)
+    filename = f"{name}-{datetime.utcnow():%Y%m%d%H%M%S}"
+    if format == ExportFormat.CSV:
+        return csv_response(rows, fields, filename)
+    return ndjson_response(rows, filename)
+
+@router.get("/members")
+async def export_members(
+    is_active: Optional[bool] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    format: ExportFormat = ExportFormat.CSV,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    query = _id_range(date_from, date_to)
+    if is_active is not None:
+        query["is_active"] = is_active
+    return _export(db.users, query, MEMBER_FIELDS, format, "members")
+
+@router.get("/contributions")
+async def export_contributions(
+    status: Optional[ContributionStatus] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    format: ExportFormat = ExportFormat.CSV,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    query = _id_range(date_from, date_to)
+    if status:
+        query["status"] = status.value
+    return _export(db.contributions, query, CONTRIBUTION_FIELDS, format, "contributions")
+
+@router.get("/transactions")
+async def export_transactions(
+    status: Optional[TransactionStatus] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    format: ExportFormat = ExportFormat.CSV,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    query = _id_range(date_from, date_to)
+    if status:
+        query["status"] = status.value
+    return _export(db.transactions, query, TRANSACTION_FIELDS, format, "transactions")
+
+@router.get("/audit-logs")
+async def export_audit_logs(
+    action: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    format: ExportFormat = ExportFormat.NDJSON,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    query = _id_range(date_from, date_to)
+    if action:
+        query["action"] = action
+    return _export(db.audit_logs, query, AUDIT_LOG_FIELDS, format, "audit-logs")
@@ -0,0 +1,69 @@
+from enum import Enum
+from typing import Optional
+from fastapi import APIRouter, Depends
+from app.core import deps
+from app.core.streaming import csv_response, ndjson_response
+from app.db.mongodb import get_database
+from app.models.transaction import TransactionStatus
+from app.models.welfare import RequestStatus
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.services import report_service
+
+router = APIRouter(dependencies=[Depends(deps.get_current_admin_user)])
+
+class ReportFormat(str, Enum):
+    JSON = "json"
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+async def _respond(db: AsyncIOMotorDatabase, name: str, format: ReportFormat, **params):
+    rows = report_service.iter_report(db, name, **params)
+    if format == ReportFormat.CSV:
+        return csv_response(rows, report_service.REPORTS[name].fields, name)
+    if format == ReportFormat.NDJSON:
+        return ndjson_response(rows, name)
+    return {"report": name, "parameters": params, "rows": [row async for row in rows]}
+
+@router.get("/collections")
+async def collections_by_period(
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    format: ReportFormat = ReportFormat.JSON,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Dues raised, collected and outstanding per month.
+    """
+    return await _respond(db, "collections", format, year_from=year_from, year_to=year_to)
+
+@router.get("/outstanding-by-graduation-year")
+async def outstanding_by_graduation_year(
+    format: ReportFormat = ReportFormat.JSON,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Unpaid dues per graduating class.
+    """
+    return await _respond(db, "outstanding-by-graduation-year", format)
+
+@router.get("/payment-methods")
+async def payment_method_mix(
+    status: Optional[TransactionStatus] = None,
+    format: ReportFormat = ReportFormat.JSON,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Transaction count and value per payment method.
+    """
+    return await _respond(db, "payment-methods", format, status=status.value if status else None)
+
+@router.get("/welfare-by-type")
+async def welfare_by_type(
+    status: RequestStatus = RequestStatus.Disbursed,
+    format: ReportFormat = ReportFormat.JSON,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Welfare requests and amounts per request type (disbursed by default).
+    """
+    return await _respond(db, "welfare-by-type", format, status=status.value)
@@ -1,39 +1,56 @@
-from fastapi import APIRouter, Request, Depends
+from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
+from app.core.assets import ShellCache, StaticAssets
+from app.core.config import settings
 
 templates = Jinja2Templates(directory="app/templates")
+static_assets = StaticAssets("app/static")
+templates.env.globals["asset_url"] = static_assets.url
+shells = ShellCache(templates.env, enabled=settings.VIEWS_CACHE_ENABLED)
 
 router = APIRouter()
 
+# Shells hold no user data (pages fetch it with the stored token), so shared caches may keep them
+SHELL_CACHE_CONTROL = "public, max-age=300"
+
+# Rendered at startup, after static_assets.load() so asset_url() yields fingerprinted URLs
+SHELLS = [
+    "auth/login.html", "auth/register.html", "member/dashboard.html", "member/welfare.html",
+    "admin/members.html", "admin/payments.html", "admin/welfare.html",
+]
+
+def _shell(request: Request, name: str):
+    return shells.get(name).respond(request, SHELL_CACHE_CONTROL)
+
 @router.get("/", response_class=HTMLResponse)
 async def index(request: Request):
-    return templates.TemplateResponse("auth/login.html", {"request": request})
+    return _shell(request, "auth/login.html")
 
 @router.get("/login", response_class=HTMLResponse)
 async def login_page(request: Request):
-    return templates.TemplateResponse("auth/login.html", {"request": request})
+    return _shell(request, "auth/login.html")
 
 @router.get("/register", response_class=HTMLResponse)
 async def register_page(request: Request):
-    return templates.TemplateResponse("auth/register.html", {"request": request})
+    return _shell(request, "auth/register.html")
 
 @router.get("/dashboard", response_class=HTMLResponse)
 async def member_dashboard(request: Request):
-    return templates.TemplateResponse("member/dashboard.html", {"request": request})
+    return _shell(request, "member/dashboard.html")
 
 @router.get("/admin/dashboard", response_class=HTMLResponse)
 async def admin_dashboard(request: Request):
-    return templates.TemplateResponse("admin/members.html", {"request": request})
+    return _shell(request, "admin/members.html")
 
 @router.get("/admin/payments", response_class=HTMLResponse)
 async def admin_payments(request: Request):
-    return templates.TemplateResponse("admin/payments.html", {"request": request})
+    return _shell(request, "admin/payments.html")
 
 @router.get("/welfare", response_class=HTMLResponse)
 async def member_welfare(request: Request):
-    return templates.TemplateResponse("member/welfare.html", {"request": request})
+    return _shell(request, "member/welfare.html")
 
 @router.get("/admin/welfare", response_class=HTMLResponse)
 async def admin_welfare(request: Request):
-    return templates.TemplateResponse("admin/welfare.html", {"request": request})
+    return _shell(request, "admin/welfare.html")
@@ -1,27 +1,28 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query
-from app.core import deps
-from app.models.user import UserInDB
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from app.core import deps, http_cache, rate_limit
+from app.core.codec import document_response, page_response
+from app.core.pagination import Page, PageParams, paginate
+from app.models.user import Principal
 from app.models.welfare import WelfareRequestInDB, WelfareRequestCreate, RequestStatus
-from app.db.mongodb import get_database
+from app.db.mongodb import get_database, secondary_reads
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
 from datetime import datetime
-from app.services import audit_service
+from app.services import audit_service, member_service, report_service
 
 router = APIRouter()
 
-@router.post("/request", response_model=WelfareRequestInDB)
+@router.post("/request", response_model=WelfareRequestInDB, dependencies=[Depends(rate_limit.limit_member_write)])
 async def create_welfare_request(
     request: WelfareRequestCreate,
-    current_user: UserInDB = Depends(deps.get_current_active_user),
+    current_user: Principal = Depends(deps.get_current_active_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     request.user_id = current_user.id
-    new_request = await db.welfare.insert_one(request.dict())
-    
-    created = await db.welfare.find_one({"_id": new_request.inserted_id})
-    created["_id"] = str(created["_id"])
+    created = request.dict()
+    new_request = await db.welfare.insert_one(created)
+    report_service.invalidate("welfare")
+    await http_cache.bump(db, [current_user.id], http_cache.WELFARE)
     
     await audit_service.log_action(
         actor_id=current_user.id,
@@ -30,51 +31,50 @@ async def create_welfare_request(
         target_id=str(new_request.inserted_id)
     )
     
-    return WelfareRequestInDB(**created)
+    # insert_one stored exactly `created` and set its _id
+    return document_response(created, WelfareRequestInDB)
 
-@router.get("/my-requests", response_model=List[WelfareRequestInDB])
+@router.get("/my-requests", response_model=Page[WelfareRequestInDB])
 async def get_my_requests(
-    current_user: UserInDB = Depends(deps.get_current_active_user),
+    request: Request,
+    params: PageParams = Depends(),
+    current_user: Principal = Depends(deps.get_current_active_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
-    cursor = db.welfare.find({"user_id": current_user.id}).sort("created_at", -1)
-    requests = await cursor.to_list(length=100)
-    
-    results = []
-    for r in requests:
-        r["_id"] = str(r["_id"])
-        results.append(WelfareRequestInDB(**r))
-    return results
+    async def build():
+        # Newest first; _id order follows insertion time
+        # Primary: a member reading back their own writes may be served by any worker
+        requests, next_cursor, total = await paginate(
+            db.welfare, {"user_id": current_user.id}, [("_id", -1)], params
+        )
+        return page_response(requests, WelfareRequestInDB, next_cursor, total)
+
+    return await http_cache.conditional_get(request, current_user.id, http_cache.WELFARE, build)
 
-@router.get("/all", dependencies=[Depends(deps.get_current_admin_user)], response_model=List[dict])
+@router.get("/all", dependencies=[Depends(deps.get_current_admin_user)], response_model=Page[dict])
 async def get_all_requests(
     status: str = None,
+    params: PageParams = Depends(),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     query = {}
     if status:
         query["status"] = status
         
-    cursor = db.welfare.find(query).sort("created_at", -1)
-    requests = await cursor.to_list(length=100)
-    
-    results = []
-    for r in requests:
-        r["_id"] = str(r["_id"])
-        # Enrich with user details
-        user = await db.users.find_one({"_id": ObjectId(r["user_id"])})
-        if user:
-            r["user_name"] = user.get("full_name")
-            r["user_email"] = user.get("email")
-        results.append(r)
-    return results
+    requests, next_cursor, total = await paginate(secondary_reads(db.welfare), query, [("_id", -1)], params)
+
+    # Enrich with user details
+    await member_service.attach_member_fields(
+        db, requests, {"user_name": "full_name", "user_email": "email"}
+    )
+    return page_response(requests, None, next_cursor, total)
 
 @router.post("/{request_id}/status", dependencies=[Depends(deps.get_current_admin_user)])
 async def update_request_status(
     request_id: str,
     status: RequestStatus,
     comment: str = None,
-    current_user: UserInDB = Depends(deps.get_current_admin_user),
+    current_user: Principal = Depends(deps.get_current_admin_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     if not ObjectId.is_valid(request_id):
@@ -87,10 +87,15 @@ async def update_request_status(
     if comment:
         update_data["admin_comments"] = comment
         
-    await db.welfare.update_one(
+    updated = await db.welfare.find_one_and_update(
         {"_id": ObjectId(request_id)},
-        {"$set": update_data}
+        {"$set": update_data},
+        projection={"user_id": 1}
     )
+    if not updated:
+        raise HTTPException(status_code=404, detail="Request not found")
+    report_service.invalidate("welfare")
+    await http_cache.bump(db, [updated["user_id"]], http_cache.WELFARE)
     
     await audit_service.log_action(
         actor_id=current_user.id,
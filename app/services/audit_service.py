@@ -1,21 +1,151 @@
+import asyncio
+import logging
+from app.core.config import settings
 from app.db.mongodb import db
-from app.models.audit import AuditLogCreate
 from datetime import datetime
+from typing import List, Optional
 
-async def log_action(actor_id: str, action: str, resource: str, target_id: str = None, details: dict = None):
+logger = logging.getLogger(__name__)
+
+def _audit_logs():
+    return db.database.audit_logs
+
+def _build_entry(actor_id: str, action: str, resource: str, target_id: str = None, details: dict = None) -> dict:
+    # Same shape as AuditLogCreate, built directly to keep validation off the hot path
+    return {
+        "action": action,
+        "target_resource": resource,
+        "target_id": target_id,
+        "actor_id": actor_id,
+        "details": details,
+        "created_at": datetime.utcnow(),
+    }
+
+# Queued by AuditSink.stop() to make the flusher drain and exit
+_STOP = object()
+
+class AuditSink:
+    """
+    Buffers audit entries in a bounded queue and writes them with insert_many once
+    `batch_size` entries are waiting or `flush_interval` seconds have passed.
+    A full queue makes producers wait (backpressure) rather than dropping entries.
+    """
+
+    def __init__(self, max_queue_size: int, batch_size: int, flush_interval: float):
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Writes out everything still queued, then stops the flusher.
+        """
+        if self._task is None:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def put(self, entry: dict) -> None:
+        await self._queue.put(entry)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "written": self.written,
+            "failed": self.failed,
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            entry = await self._queue.get()
+            if entry is _STOP:
+                break
+
+            batch = [entry]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[dict]) -> None:
+        if not batch or db.database is None:
+            return
+        try:
+            await _audit_logs().insert_many(batch, ordered=False)
+            self.written += len(batch)
+        except Exception:
+            self.failed += len(batch)
+            logger.exception("Failed to write %d audit log entries", len(batch))
+
+audit_sink = AuditSink(
+    max_queue_size=settings.AUDIT_QUEUE_MAX_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+)
+
+async def log_action(
+    actor_id: str,
+    action: str,
+    resource: str,
+    target_id: str = None,
+    details: dict = None,
+):
     """
     Logs an action to the audit collection.
+    Entries are buffered and written in batches; use log_actions with a session for
+    entries that must commit together with the change they record.
     """
-    if db.client is None:
+    if db.database is None:
         return # DB not connected
 
-    log_entry = AuditLogCreate(
-        actor_id=actor_id,
-        action=action,
-        target_resource=resource,
-        target_id=target_id,
-        details=details,
-        created_at=datetime.utcnow()
-    )
-    
-    await db.client[db.client.keywords.get('database', 'AlumniDB')].audit_logs.insert_one(log_entry.dict())
+    entry = _build_entry(actor_id, action, resource, target_id, details)
+    if not audit_sink.running:
+        await _audit_logs().insert_one(entry)
+    else:
+        await audit_sink.put(entry)
+
+async def log_actions(entries: List[dict], session=None):
+    """
+    Logs many actions with a single insert. Each entry takes the keyword arguments of log_action.
+    Pass a session to make the entries part of a transaction.
+    """
+    if db.database is None or not entries:
+        return
+
+    logs = [
+        _build_entry(
+            entry["actor_id"],
+            entry["action"],
+            entry["resource"],
+            entry.get("target_id"),
+            entry.get("details"),
+        )
+        for entry in entries
+    ]
+
+    await _audit_logs().insert_many(logs, ordered=False, session=session)
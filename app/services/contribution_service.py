@@ -1,14 +1,35 @@
+import logging
+import time
 from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+from bson import ObjectId
+from app.core import http_cache
 from app.db.mongodb import get_database
 from app.models.contribution import ContributionCreate, ContributionStatus
 from app.models.user import Role
+from app.services import report_service, summary_service
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError
 
-async def generate_monthly_contributions(db: AsyncIOMotorDatabase):
+logger = logging.getLogger(__name__)
+
+GENERATION_CHUNK_SIZE = 500
+
+# progress(processed, total) callback used by background jobs
+ProgressCallback = Callable[..., Awaitable[None]]
+
+async def generate_monthly_contributions(
+    db: AsyncIOMotorDatabase, progress: Optional[ProgressCallback] = None
+) -> dict:
     """
     Generates contribution records for all active members for the current month.
     Should be run via a scheduler or admin trigger.
+
+    Idempotent: members that already have a record for the period are skipped, and
+    concurrent runs are deduplicated by the unique (user_id, year, month) index
+    declared in app/models/indexes.py.
     """
+    started = time.perf_counter()
     now = datetime.utcnow()
     current_month = now.month
     current_year = now.year
@@ -17,39 +38,95 @@ async def generate_monthly_contributions(db: AsyncIOMotorDatabase):
     # User requirement: "Configurable due date". Defaulting to 1st of month creation for now.
     # Logic: Created on 1st, Due on 15th maybe?
     due_date = now + timedelta(days=14) # Simple 2 week grace?
-    
+
+    # Existing (user_id, month, year) keys for the period, in one query
+    existing = set()
+    async for c in db.contributions.find(
+        {"month": current_month, "year": current_year}, {"user_id": 1, "_id": 0}
+    ):
+        existing.add(c["user_id"])
+
     # Find all active members
-    async for user in db.users.find({"is_active": True, "role": Role.MEMBER}):
-        user_id = str(user["_id"])
-        
-        # Check if exists
-        existing = await db.contributions.find_one({
-            "user_id": user_id,
-            "month": current_month,
-            "year": current_year
-        })
-        
-        if not existing:
-            contribution = ContributionCreate(
+    member_ids = [
+        str(user["_id"])
+        async for user in db.users.find({"is_active": True, "role": Role.MEMBER}, {"_id": 1})
+    ]
+    missing = [user_id for user_id in member_ids if user_id not in existing]
+    if progress:
+        await progress(0, len(missing))
+
+    created = 0
+    for i in range(0, len(missing), GENERATION_CHUNK_SIZE):
+        chunk = [
+            ContributionCreate(
                 user_id=user_id,
                 month=current_month,
                 year=current_year,
                 amount_due=1000.00,
                 status=ContributionStatus.PENDING,
                 due_date=due_date
-            )
-            await db.contributions.insert_one(contribution.dict())
-            print(f"Generated contribution for User {user_id} - {current_month}/{current_year}")
+            ).dict()
+            for user_id in missing[i:i + GENERATION_CHUNK_SIZE]
+        ]
+        try:
+            await db.contributions.insert_many(chunk, ordered=False)
+            inserted = chunk
+        except BulkWriteError as e:
+            # Duplicate keys mean a concurrent run already created those records
+            write_errors = e.details.get("writeErrors", [])
+            if any(err.get("code") != 11000 for err in write_errors):
+                raise
+            failed = {err["index"] for err in write_errors}
+            inserted = [doc for i, doc in enumerate(chunk) if i not in failed]
+        created += len(inserted)
+        await summary_service.record_generated(db, inserted)
+        report_service.invalidate("contributions")
+        if progress:
+            await progress(min(i + GENERATION_CHUNK_SIZE, len(missing)), len(missing))
 
-async def check_late_contributions(db: AsyncIOMotorDatabase):
+    report = {
+        "month": current_month,
+        "year": current_year,
+        "members": len(member_ids),
+        "created": created,
+        "skipped": len(member_ids) - created,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+    if created:
+        await http_cache.bump(db, [http_cache.ALL_MEMBERS], http_cache.CONTRIBUTIONS)
+    logger.info("Generated monthly contributions: %s", report)
+    return report
+
+async def check_late_contributions(
+    db: AsyncIOMotorDatabase, progress: Optional[ProgressCallback] = None
+) -> dict:
     """
     Update Pending contributions post-due-date to Late.
     """
     now = datetime.utcnow()
-    await db.contributions.update_many(
-        {
-            "status": ContributionStatus.PENDING,
-            "due_date": {"$lt": now}
-        },
-        {"$set": {"status": ContributionStatus.LATE}}
-    )
+    overdue = {"status": ContributionStatus.PENDING, "due_date": {"$lt": now}}
+    contributions = await db.contributions.find(
+        overdue, {"user_id": 1, "year": 1, "month": 1}
+    ).to_list(length=None)
+
+    # Rows are stamped with this run's id so the summaries count only the rows this call
+    # changed, not ones paid meanwhile or already marked by a concurrent run
+    run_id = ObjectId()
+    marked = 0
+    for i in range(0, len(contributions), GENERATION_CHUNK_SIZE):
+        chunk_ids = [c["_id"] for c in contributions[i:i + GENERATION_CHUNK_SIZE]]
+        await db.contributions.update_many(
+            {"_id": {"$in": chunk_ids}, **overdue},
+            {"$set": {"status": ContributionStatus.LATE, "late_run": run_id}}
+        )
+        changed = await db.contributions.find(
+            {"_id": {"$in": chunk_ids}, "late_run": run_id}, {"user_id": 1, "year": 1, "month": 1}
+        ).to_list(length=None)
+        marked += len(changed)
+        await summary_service.record_marked_late(db, changed)
+        report_service.invalidate("contributions")
+        if progress:
+            await progress(min(i + GENERATION_CHUNK_SIZE, len(contributions)), len(contributions))
+    if marked:
+        await http_cache.bump(db, [http_cache.ALL_MEMBERS], http_cache.CONTRIBUTIONS)
+    return {"marked_late": marked}
@@ -0,0 +1,140 @@
+import asyncio
+import csv
+import io
+import json
+import time
+from typing import List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+from app.core import security
+from app.core.config import settings
+from app.models.user import UserCreate
+from app.services import search_service
+
+IMPORT_CHUNK_SIZE = 500
+
+class ImportFileError(ValueError):
+    pass
+
+def parse_rows(content: bytes, filename: Optional[str], content_type: Optional[str]) -> List[dict]:
+    """
+    Reads a JSON array of objects or a CSV file with a header row.
+    Empty CSV cells are treated as missing values.
+    """
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ImportFileError("File must be UTF-8 encoded")
+
+    is_json = (filename or "").lower().endswith(".json") or (content_type or "").endswith("json")
+    if is_json:
+        try:
+            rows = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ImportFileError(f"Invalid JSON: {e}")
+        if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+            raise ImportFileError("JSON import must be an array of objects")
+    else:
+        rows = [
+            {key.strip(): value.strip() for key, value in row.items() if key and value and value.strip()}
+            for row in csv.DictReader(io.StringIO(text))
+        ]
+
+    if len(rows) > settings.IMPORT_MAX_ROWS:
+        raise ImportFileError(f"Import is limited to {settings.IMPORT_MAX_ROWS} rows per file")
+    return rows
+
+async def _hash_all(passwords: List[str]) -> List[str]:
+    # Bounded so an import never takes every hashing worker away from logins
+    semaphore = asyncio.Semaphore(settings.IMPORT_HASH_CONCURRENCY)
+
+    async def hash_one(password: str) -> str:
+        async with semaphore:
+            return await security.hash_password(password)
+
+    return await asyncio.gather(*(hash_one(p) for p in passwords))
+
+async def import_members(db: AsyncIOMotorDatabase, rows: List[dict], progress=None) -> dict:
+    """
+    Validates rows against UserCreate, skips emails already present (in the file or the
+    database, checked with one query), hashes passwords in parallel and inserts with
+    chunked unordered insert_many. Returns a per-row report, rows numbered from 1.
+    Runs as the `import_members` background job; bcrypt makes large files take minutes.
+    """
+    started = time.perf_counter()
+    results: List[dict] = [None] * len(rows)
+    valid = []  # (index, UserCreate)
+    seen = set()
+
+    for i, row in enumerate(rows):
+        try:
+            user_in = UserCreate(**row)
+        except ValidationError as e:
+            results[i] = {
+                "row": i + 1,
+                "email": row.get("email"),
+                "status": "invalid",
+                "errors": [f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()],
+            }
+            continue
+        if user_in.email in seen:
+            results[i] = {"row": i + 1, "email": user_in.email, "status": "duplicate", "errors": ["Repeated in file"]}
+            continue
+        seen.add(user_in.email)
+        valid.append((i, user_in))
+
+    existing = set()
+    if valid:
+        async for user in db.users.find({"email": {"$in": [u.email for _, u in valid]}}, {"email": 1}):
+            existing.add(user["email"])
+
+    to_create = []
+    for i, user_in in valid:
+        if user_in.email in existing:
+            results[i] = {"row": i + 1, "email": user_in.email, "status": "duplicate", "errors": ["Email already registered"]}
+        else:
+            to_create.append((i, user_in))
+
+    if progress:
+        await progress(0, len(to_create))
+    # Hash and insert chunk by chunk so progress is reported as the import goes
+    for start in range(0, len(to_create), IMPORT_CHUNK_SIZE):
+        batch = to_create[start:start + IMPORT_CHUNK_SIZE]
+        hashes = await _hash_all([u.password for _, u in batch])
+
+        chunk = []
+        for (i, user_in), hashed_password in zip(batch, hashes):
+            user_data = user_in.dict()
+            del user_data["password"]
+            user_data["hashed_password"] = hashed_password
+            user_data["search_tokens"] = search_service.search_tokens_for(user_data)
+            chunk.append((i, user_data))
+
+        failed = {}
+        try:
+            await db.users.insert_many([doc for _, doc in chunk], ordered=False)
+        except BulkWriteError as e:
+            for err in e.details.get("writeErrors", []):
+                failed[err["index"]] = err
+        for j, (i, doc) in enumerate(chunk):
+            if j in failed:
+                if failed[j].get("code") == 11000:
+                    status, reason = "duplicate", "Email already registered"
+                else:
+                    status, reason = "error", failed[j].get("errmsg")
+                results[i] = {"row": i + 1, "email": doc["email"], "status": status, "errors": [reason]}
+            else:
+                # insert_many sets _id on the documents it sends
+                results[i] = {"row": i + 1, "email": doc["email"], "status": "created", "id": str(doc["_id"])}
+        if progress:
+            await progress(min(start + IMPORT_CHUNK_SIZE, len(to_create)), len(to_create))
+
+    created = sum(1 for r in results if r["status"] == "created")
+    return {
+        "total": len(rows),
+        "created": created,
+        "failed": len(rows) - created,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        "rows": results,
+    }
@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional, Set
+from bson import ObjectId
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+from app.core.config import settings
+from app.models.job import JobCreate, JobStatus
+from app.services import (
+    audit_service, contribution_service, import_service, notification_service, report_service, summary_service,
+)
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between persisted progress updates of a running job
+PROGRESS_INTERVAL = 1.0
+
+class JobAlreadyRunning(Exception):
+    def __init__(self, job_id: str):
+        super().__init__(f"Job {job_id} is already queued or running")
+        self.job_id = job_id
+
+@dataclass
+class JobContext:
+    """
+    Handed to a job function: who started it and how to report progress.
+    """
+    db: AsyncIOMotorDatabase
+    job_id: str
+    actor_id: str
+    # Inputs handed over in-process, never persisted (an import's rows carry passwords)
+    params: dict = field(default_factory=dict)
+    _last_report: float = field(default=0.0, init=False)
+
+    async def progress(self, processed: int, total: Optional[int] = None, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_report < PROGRESS_INTERVAL and processed != total:
+            return
+        self._last_report = now
+
+        update = {"processed": processed, "updated_at": datetime.utcnow()}
+        if total is not None:
+            update["total"] = total
+        await self.db.jobs.update_one({"_id": ObjectId(self.job_id)}, {"$set": update})
+
+JobFunc = Callable[[JobContext], Awaitable[Optional[dict]]]
+
+# kind -> coroutine function, see register()
+JOBS: Dict[str, JobFunc] = {}
+
+def register(kind: str):
+    def decorator(func: JobFunc) -> JobFunc:
+        JOBS[kind] = func
+        return func
+    return decorator
+
+class JobRunner:
+    """
+    Runs registered jobs as asyncio tasks with persisted state in the `jobs` collection.
+    At most one job per kind is active at a time, and at most `max_concurrency` jobs run at once.
+    """
+
+    def __init__(self, max_concurrency: int, stale_after_seconds: int):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._stale_after = timedelta(seconds=stale_after_seconds)
+        self._lock = asyncio.Lock()
+        self._active: Dict[str, str] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def enqueue(self, db: AsyncIOMotorDatabase, kind: str, actor_id: str, params: Optional[dict] = None) -> str:
+        if kind not in JOBS:
+            raise KeyError(kind)
+
+        async with self._lock:
+            if kind in self._active:
+                raise JobAlreadyRunning(self._active[kind])
+            job_id = await self._claim(db, kind, actor_id)
+            self._active[kind] = job_id
+
+        task = asyncio.create_task(self._run(db, kind, job_id, actor_id, params or {}), name=job_id)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job_id
+
+    async def _claim(self, db: AsyncIOMotorDatabase, kind: str, actor_id: str) -> str:
+        """
+        Inserts the job; the kind_active_unique index turns away a second active job of
+        the same kind from any worker. An active job whose heartbeat stopped (its worker
+        died) is failed and replaced.
+        """
+        for _ in range(2):
+            try:
+                new_job = await db.jobs.insert_one(JobCreate(kind=kind, created_by=actor_id).dict())
+                return str(new_job.inserted_id)
+            except DuplicateKeyError:
+                existing = await db.jobs.find_one({"kind": kind, "active": True})
+                if existing is None:
+                    continue  # finished in the meantime
+                now = datetime.utcnow()
+                heartbeat = existing.get("heartbeat_at") or existing["updated_at"]
+                if heartbeat > now - self._stale_after:
+                    raise JobAlreadyRunning(str(existing["_id"]))
+                # Guarded on the heartbeat read above, so a job that just beat is left alone
+                await db.jobs.update_one(
+                    {"_id": existing["_id"], "active": True, "heartbeat_at": existing.get("heartbeat_at")},
+                    {"$set": {
+                        "status": JobStatus.FAILED, "error": "Abandoned (no heartbeat)",
+                        "finished_at": now, "updated_at": now,
+                    }, "$unset": {"active": ""}},
+                )
+        raise JobAlreadyRunning(str(existing["_id"]) if existing else "unknown")
+
+    async def _heartbeat(self, db: AsyncIOMotorDatabase, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(settings.JOB_HEARTBEAT_SECONDS)
+            try:
+                await db.jobs.update_one(
+                    {"_id": ObjectId(job_id), "active": True}, {"$set": {"heartbeat_at": datetime.utcnow()}}
+                )
+            except Exception:
+                logger.exception("Failed to record heartbeat for job %s", job_id)
+
+    async def wait(self, job_id: str) -> None:
+        """
+        Waits for an in-process job to finish (used by the scheduler).
+        """
+        for task in list(self._tasks):
+            if task.get_name() == job_id:
+                await asyncio.shield(task)
+
+    async def shutdown(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run(self, db: AsyncIOMotorDatabase, kind: str, job_id: str, actor_id: str, params: dict):
+        # Beats while queued behind the semaphore as well as while running
+        heartbeat = asyncio.create_task(self._heartbeat(db, job_id))
+        try:
+            async with self._semaphore:
+                now = datetime.utcnow()
+                await db.jobs.update_one(
+                    {"_id": ObjectId(job_id)},
+                    {"$set": {"status": JobStatus.RUNNING, "started_at": now, "updated_at": now}}
+                )
+                started = time.perf_counter()
+                result = await JOBS[kind](JobContext(db=db, job_id=job_id, actor_id=actor_id, params=params))
+                result = dict(result or {})
+                result.setdefault("elapsed_ms", round((time.perf_counter() - started) * 1000, 2))
+                await self._finish(db, job_id, JobStatus.DONE, result=result)
+        except asyncio.CancelledError:
+            await self._finish(db, job_id, JobStatus.FAILED, error="Interrupted by shutdown")
+            raise
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job_id, kind)
+            await self._finish(db, job_id, JobStatus.FAILED, error=str(e))
+        finally:
+            heartbeat.cancel()
+            if self._active.get(kind) == job_id:
+                del self._active[kind]
+
+    async def _finish(self, db, job_id: str, status: JobStatus, result: dict = None, error: str = None):
+        now = datetime.utcnow()
+        await db.jobs.update_one(
+            {"_id": ObjectId(job_id)},
+            {"$set": {
+                "status": status,
+                "result": result,
+                "error": error,
+                "finished_at": now,
+                "updated_at": now,
+            }, "$unset": {"active": ""}}
+        )
+
+async def enqueue_or_conflict(
+    db: AsyncIOMotorDatabase, kind: str, actor_id: str, params: Optional[dict] = None
+) -> dict:
+    """
+    Enqueues a job for an HTTP trigger, answering 409 if the same kind is already active.
+    """
+    try:
+        job_id = await job_runner.enqueue(db, kind, actor_id, params)
+    except JobAlreadyRunning as e:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": f"A {kind} job is already in progress", "job_id": e.job_id},
+        )
+    return {"job_id": job_id, "status": JobStatus.QUEUED, "status_url": f"{settings.API_V1_STR}/admin/jobs/{job_id}"}
+
+job_runner = JobRunner(
+    max_concurrency=settings.JOB_MAX_CONCURRENCY,
+    stale_after_seconds=settings.JOB_STALE_SECONDS,
+)
+
+# --- Registered jobs ---
+
+@register("generate_monthly")
+async def _generate_monthly(ctx: JobContext):
+    report = await contribution_service.generate_monthly_contributions(ctx.db, progress=ctx.progress)
+    await audit_service.log_action(
+        actor_id=ctx.actor_id,
+        action="GENERATE_CONTRIBUTIONS",
+        resource="contributions",
+        details={"status": "success", "job_id": ctx.job_id, **report}
+    )
+    return report
+
+@register("mark_late")
+async def _mark_late(ctx: JobContext):
+    return await contribution_service.check_late_contributions(ctx.db, progress=ctx.progress)
+
+@register("send_reminders")
+async def _send_reminders(ctx: JobContext):
+    return await notification_service.send_reminders(
+        ctx.db, progress=ctx.progress, run_id=ctx.params.get("scheduler_run_id")
+    )
+
+@register("rebuild_summaries")
+async def _rebuild_summaries(ctx: JobContext):
+    return await summary_service.rebuild_summaries(ctx.db, progress=ctx.progress)
+
+@register("import_members")
+async def _import_members(ctx: JobContext):
+    report = await import_service.import_members(ctx.db, ctx.params["rows"], progress=ctx.progress)
+    if report["created"]:
+        report_service.invalidate("users")
+    await audit_service.log_action(
+        actor_id=ctx.actor_id,
+        action="IMPORT_MEMBERS",
+        resource="users",
+        details={
+            "filename": ctx.params.get("filename"), "job_id": ctx.job_id,
+            "total": report["total"], "created": report["created"],
+        }
+    )
+    return report
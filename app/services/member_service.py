@@ -0,0 +1,53 @@
+from typing import Dict, Iterable, List, Mapping
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.db.mongodb import secondary_reads
+
+# Default output key -> users field used when enriching listings for display
+MEMBER_DISPLAY_FIELDS = {
+    "user_email": "email",
+    "user_full_name": "full_name",
+}
+
+async def get_members_by_id(
+    db: AsyncIOMotorDatabase,
+    user_ids: Iterable[str],
+    fields: Iterable[str] = ("email", "full_name"),
+) -> Dict[str, dict]:
+    """
+    Resolves many user ids with a single $in query, projecting only the requested fields.
+    Invalid ids are ignored. Reads may be served by a secondary; use for display only.
+    """
+    object_ids = {ObjectId(uid) for uid in user_ids if uid and ObjectId.is_valid(uid)}
+    if not object_ids:
+        return {}
+
+    projection = {field: 1 for field in fields}
+    cursor = secondary_reads(db.users).find({"_id": {"$in": list(object_ids)}}, projection)
+
+    members = {}
+    async for user in cursor:
+        members[str(user["_id"])] = user
+    return members
+
+async def attach_member_fields(
+    db: AsyncIOMotorDatabase,
+    documents: List[dict],
+    field_map: Mapping[str, str] = MEMBER_DISPLAY_FIELDS,
+) -> List[dict]:
+    """
+    Adds member display fields to each document referencing a `user_id`.
+    `field_map` maps the key written on the document to the users field it is read from.
+    """
+    members = await get_members_by_id(
+        db,
+        (doc.get("user_id") for doc in documents),
+        fields=set(field_map.values()),
+    )
+
+    for doc in documents:
+        member = members.get(doc.get("user_id"))
+        if member:
+            for target, source in field_map.items():
+                doc[target] = member.get(source)
+    return documents
@@ -1,43 +1,149 @@
-from app.db.mongodb import db
-from app.models.contribution import ContributionStatus
+import asyncio
+import logging
+import time
 from datetime import datetime
-from app.services import audit_service
+from typing import List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.config import settings
+from app.models.contribution import ContributionStatus
+from app.services import audit_service, member_service
+from app.services.transports import OutgoingMessage, Transport, get_transport
+
+logger = logging.getLogger(__name__)
 
-async def send_reminders():
+def build_reminder(member: dict, dues: List[dict]) -> OutgoingMessage:
     """
-    Simulates sending reminders to users with Pending or Late contributions.
-    For MVP, we just log to Audit Logs or Console.
+    One message per member, listing every outstanding due.
+    """
+    outstanding = sum(d["amount_due"] - d.get("amount_paid", 0) for d in dues)
+    lines = [
+        f"- {datetime(d['year'], d['month'], 1):%B %Y}: {d['amount_due'] - d.get('amount_paid', 0):,.2f} ({d['status']})"
+        for d in sorted(dues, key=lambda d: (d["year"], d["month"]))
+    ]
+    body = (
+        f"Dear {member.get('full_name') or 'member'},\n\n"
+        f"You have {len(dues)} outstanding contribution(s) totalling {outstanding:,.2f}:\n"
+        + "\n".join(lines)
+        + "\n\nPlease log in to submit your payment.\n"
+    )
+    return OutgoingMessage(
+        to=member["email"],
+        subject=f"{settings.PROJECT_NAME}: {len(dues)} outstanding contribution(s)",
+        body=body,
+        user_id=str(member["_id"]),
+    )
+
+async def _deliver(transport: Transport, message: OutgoingMessage, semaphore: asyncio.Semaphore) -> Optional[str]:
     """
-    if db.client is None:
-        return
-        
-    keyword_args = db.client.keywords
-    dbname = keyword_args.get('database', 'AlumniDB')
-    
-    # 1. Find pending dues
-    cursor = db.client[dbname].contributions.find({
-        "status": {"$in": [ContributionStatus.PENDING, ContributionStatus.LATE]}
-    })
-    
-    count = 0
-    async for due in cursor:
-        user_id = due["user_id"]
-        status = due["status"]
-        amount = due["amount_due"]
-        
-        # Simulate lookup user email (omitted for speed unless needed)
-        
-        # Log the "sending" action
-        msg = f"Simulating Email to User {user_id}: You have a {status} contribution of {amount}."
-        print(msg)
-        
-        await audit_service.log_action(
-            actor_id="SYSTEM",
-            action="SEND_REMINDER",
-            resource="notifications",
-            target_id=user_id,
-            details={"message": msg, "type": "email"}
-        )
-        count += 1
-        
-    return count
+    Sends with exponential backoff; returns the last error, or None on success.
+    """
+    error = None
+    async with semaphore:
+        for attempt in range(settings.REMINDER_MAX_RETRIES + 1):
+            try:
+                await transport.send(message)
+                return None
+            except Exception as e:
+                error = str(e)
+                if attempt < settings.REMINDER_MAX_RETRIES:
+                    await asyncio.sleep(settings.REMINDER_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+    logger.warning("Reminder to %s failed: %s", message.to, error)
+    return error
+
+async def send_reminders(
+    db: AsyncIOMotorDatabase, progress=None, transport: Transport = None, run_id: Optional[str] = None
+) -> dict:
+    """
+    Sends one reminder per member with Pending or Late contributions.
+    Dues are grouped per member server-side, contact details are resolved in one query,
+    delivery fans out with bounded concurrency and the audit trail is written in bulk.
+
+    With a scheduler `run_id`, each member reminded is recorded on that run's
+    `notified` list and skipped if the run is taken over and started again.
+    """
+    started = time.perf_counter()
+    transport = transport or get_transport()
+
+    # 1. Pending dues, grouped per member
+    dues_by_user = {}
+    async for group in db.contributions.aggregate([
+        {"$match": {"status": {"$in": [ContributionStatus.PENDING, ContributionStatus.LATE]}}},
+        {"$group": {
+            "_id": "$user_id",
+            "dues": {"$push": {
+                "month": "$month",
+                "year": "$year",
+                "status": "$status",
+                "amount_due": "$amount_due",
+                "amount_paid": "$amount_paid",
+            }},
+        }},
+    ]):
+        dues_by_user[group["_id"]] = group["dues"]
+
+    # 2. Contact details in one batched lookup
+    members = await member_service.get_members_by_id(
+        db, dues_by_user.keys(), fields=("email", "full_name", "is_active")
+    )
+    already_sent = set()
+    if run_id:
+        run = await db.scheduler_runs.find_one({"_id": run_id}, {"notified": 1})
+        already_sent = set((run or {}).get("notified", []))
+    messages = [
+        build_reminder(member, dues_by_user[user_id])
+        for user_id, member in members.items()
+        if member.get("is_active", True) and member.get("email") and user_id not in already_sent
+    ]
+    if progress:
+        await progress(0, len(messages), force=True)
+
+    # 3. Fan out through the transport
+    semaphore = asyncio.Semaphore(settings.REMINDER_CONCURRENCY)
+    done = 0
+
+    async def deliver(message: OutgoingMessage):
+        nonlocal done
+        error = await _deliver(transport, message, semaphore)
+        if error is None and run_id:
+            await db.scheduler_runs.update_one({"_id": run_id}, {"$push": {"notified": message.user_id}})
+        done += 1
+        if progress:
+            await progress(done, len(messages))
+        return error
+
+    try:
+        errors = await asyncio.gather(*(deliver(m) for m in messages))
+    finally:
+        await transport.close()
+
+    # 4. Audit trail in a single write
+    await audit_service.log_actions([
+        {
+            "actor_id": "SYSTEM",
+            "action": "SEND_REMINDER" if error is None else "SEND_REMINDER_FAILED",
+            "resource": "notifications",
+            "target_id": message.user_id,
+            "details": {
+                "type": transport.name,
+                "dues": len(dues_by_user[message.user_id]),
+                **({"error": error} if error else {}),
+            },
+        }
+        for message, error in zip(messages, errors)
+    ])
+
+    elapsed = time.perf_counter() - started
+    failed = sum(1 for e in errors if e is not None)
+    report = {
+        "members": len(dues_by_user),
+        "dues": sum(len(d) for d in dues_by_user.values()),
+        "sent": len(messages) - failed,
+        "failed": failed,
+        "skipped": len(dues_by_user) - len(messages) - len(already_sent),
+        "already_sent": len(already_sent),
+        "transport": transport.name,
+        "elapsed_ms": round(elapsed * 1000, 2),
+        "messages_per_sec": round(len(messages) / elapsed, 2) if elapsed > 0 else None,
+    }
+    logger.info("Reminder run finished: %s", report)
+    return report
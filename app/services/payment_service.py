@@ -0,0 +1,234 @@
+"""
+Payment verification as a guarded state transition.
+
+A transaction moves Pending -> Verified/Rejected only through an update filtered on
+`status: Pending`, and a contribution moves Pending/Late -> Paid the same way, so
+concurrent admins, double clicks and client retries can apply a verification at most
+once. The dependent writes (score, summaries, audit entries) run in the same Mongo
+transaction as the state change; see run_in_transaction for standalone servers.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List
+from bson import ObjectId
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from app.core import http_cache
+from app.core.user_cache import user_cache
+from app.db.mongodb import run_in_transaction
+from app.models.contribution import ContributionStatus
+from app.models.transaction import TransactionStatus
+from app.services import audit_service, report_service, summary_service
+
+ON_TIME_POINTS = 10
+LATE_POINTS = 5
+
+PAYABLE = [ContributionStatus.PENDING, ContributionStatus.LATE]
+
+def score_points(paid_at: datetime, due_date: datetime) -> int:
+    return ON_TIME_POINTS if paid_at <= due_date else LATE_POINTS
+
+def _payment_audit(actor_id: str, action: str, tx: dict, **details) -> dict:
+    return {
+        "actor_id": actor_id,
+        "action": f"PAYMENT_{action.upper()}",
+        "resource": "transactions",
+        "target_id": str(tx["_id"]),
+        "details": {"amount": tx["amount"], "method": tx["payment_method"], **details},
+    }
+
+def _score_audit(actor_id: str, user_id: str, points: int) -> dict:
+    return {
+        "actor_id": actor_id,
+        "action": "UPDATE_SCORE",
+        "resource": "users",
+        "target_id": user_id,
+        "details": {"points_added": points, "reason": "Payment Verified"},
+    }
+
+async def _invalidate(db: AsyncIOMotorDatabase, member_ids, scored_user_ids) -> None:
+    report_service.invalidate("transactions")
+    if scored_user_ids:
+        report_service.invalidate("contributions")
+    for user_id in scored_user_ids:
+        user_cache.invalidate_id(user_id)
+    await http_cache.bump(db, member_ids, http_cache.CONTRIBUTIONS)
+    await http_cache.bump(db, scored_user_ids, http_cache.ME)
+
+async def verify_payment(db: AsyncIOMotorDatabase, transaction_id: str, approve: bool, actor_id: str) -> dict:
+    """
+    Approves or rejects one pending transaction.
+    Raises 404 for an unknown id and 409 if it was already verified or rejected.
+    """
+    if not ObjectId.is_valid(transaction_id):
+        raise HTTPException(status_code=400, detail="Invalid ID")
+    oid = ObjectId(transaction_id)
+    new_status = TransactionStatus.VERIFIED if approve else TransactionStatus.REJECTED
+    action = "approve" if approve else "reject"
+
+    async def apply(session):
+        now = datetime.utcnow()
+        tx = await db.transactions.find_one_and_update(
+            {"_id": oid, "status": TransactionStatus.PENDING},
+            {"$set": {"status": new_status, "verified_by": actor_id, "verified_at": now}},
+            session=session,
+        )
+        if tx is None:
+            existing = await db.transactions.find_one({"_id": oid}, {"status": 1}, session=session)
+            if not existing:
+                raise HTTPException(status_code=404, detail="Transaction not found")
+            raise HTTPException(status_code=409, detail=f"Transaction already {existing['status']}")
+
+        audits = [_payment_audit(actor_id, action, tx)]
+        result = {"transaction_id": transaction_id, "status": new_status.value, "user_id": tx["user_id"]}
+
+        contribution_id = tx.get("contribution_id")
+        if approve and contribution_id and ObjectId.is_valid(contribution_id):
+            contribution = await db.contributions.find_one_and_update(
+                {"_id": ObjectId(contribution_id), "status": {"$in": PAYABLE}},
+                {"$set": {"status": ContributionStatus.PAID, "amount_paid": tx["amount"], "paid_at": now}},
+                session=session,
+            )
+            if contribution:
+                on_time = now <= contribution["due_date"]
+                points = score_points(now, contribution["due_date"])
+                await db.users.update_one(
+                    {"_id": ObjectId(tx["user_id"])},
+                    {"$inc": {"contribution_score": points}},
+                    session=session,
+                )
+                member_update, period_update = summary_service.paid_updates(
+                    contribution, tx["amount"], points, on_time=on_time, paid_at=now
+                )
+                await db.member_summaries.bulk_write([member_update], session=session)
+                await db.period_summaries.bulk_write([period_update], session=session)
+                audits.append(_score_audit(actor_id, tx["user_id"], points))
+                result["points"] = points
+
+        await audit_service.log_actions(audits, session=session)
+        return result
+
+    result = await run_in_transaction(apply)
+    await _invalidate(db, [result["user_id"]], [result["user_id"]] if "points" in result else [])
+    return {"message": f"Payment {action}d successfully", **result}
+
+async def verify_payments(db: AsyncIOMotorDatabase, transaction_ids: List[str], approve: bool, actor_id: str) -> dict:
+    """
+    Approves or rejects many pending transactions at once.
+
+    Pending transactions are claimed with one update_many stamped with a batch id and
+    read back with one query, so only the ones this call actually moved are processed.
+    Their contributions are claimed the same way; score, summary and audit writes are
+    then applied with one bulk write per collection, all in a single Mongo transaction.
+    Returns an outcome per requested id, in request order.
+    """
+    new_status = TransactionStatus.VERIFIED if approve else TransactionStatus.REJECTED
+    action = "approve" if approve else "reject"
+
+    ids = list(dict.fromkeys(transaction_ids))
+    invalid = [transaction_id for transaction_id in ids if not ObjectId.is_valid(transaction_id)]
+    oids = [ObjectId(transaction_id) for transaction_id in ids if transaction_id not in invalid]
+
+    async def apply(session):
+        now = datetime.utcnow()
+        batch_id = ObjectId()
+        outcomes: Dict[str, dict] = {
+            transaction_id: {"transaction_id": transaction_id, "status": "invalid", "detail": "Invalid ID"}
+            for transaction_id in invalid
+        }
+
+        await db.transactions.update_many(
+            {"_id": {"$in": oids}, "status": TransactionStatus.PENDING},
+            {"$set": {"status": new_status, "verified_by": actor_id, "verified_at": now, "verification_batch": batch_id}},
+            session=session,
+        )
+        txs = {str(tx["_id"]): tx async for tx in db.transactions.find({"_id": {"$in": oids}}, session=session)}
+
+        won = []
+        for transaction_id in ids:
+            if transaction_id in outcomes:
+                continue
+            tx = txs.get(transaction_id)
+            if not tx:
+                outcomes[transaction_id] = {"transaction_id": transaction_id, "status": "not_found", "detail": "Transaction not found"}
+            elif tx.get("verification_batch") != batch_id:
+                outcomes[transaction_id] = {"transaction_id": transaction_id, "status": "skipped", "detail": f"Already {tx['status']}"}
+            else:
+                outcomes[transaction_id] = {"transaction_id": transaction_id, "status": new_status.value.lower()}
+                won.append(tx)
+
+        audits = [_payment_audit(actor_id, action, tx, batch=str(batch_id)) for tx in won]
+        points_by_user = defaultdict(int)
+        paid = []
+
+        # The first approved transaction for each contribution pays it
+        tx_by_contribution: Dict[ObjectId, dict] = {}
+        if approve:
+            for tx in won:
+                contribution_id = tx.get("contribution_id")
+                if contribution_id and ObjectId.is_valid(contribution_id):
+                    tx_by_contribution.setdefault(ObjectId(contribution_id), tx)
+
+        if tx_by_contribution:
+            payable = {
+                c["_id"]: c
+                async for c in db.contributions.find(
+                    {"_id": {"$in": list(tx_by_contribution)}, "status": {"$in": PAYABLE}}, session=session
+                )
+            }
+            if payable:
+                await db.contributions.bulk_write([
+                    UpdateOne(
+                        {"_id": contribution_id, "status": {"$in": PAYABLE}},
+                        {"$set": {
+                            "status": ContributionStatus.PAID,
+                            "amount_paid": tx_by_contribution[contribution_id]["amount"],
+                            "paid_at": now,
+                            "payment_batch": batch_id,
+                        }},
+                    )
+                    for contribution_id in payable
+                ], ordered=False, session=session)
+                async for c in db.contributions.find(
+                    {"_id": {"$in": list(payable)}, "payment_batch": batch_id}, {"_id": 1}, session=session
+                ):
+                    paid.append((payable[c["_id"]], tx_by_contribution[c["_id"]]))
+
+        member_summary_writes, period_summary_writes = [], []
+        for contribution, tx in paid:
+            points = score_points(now, contribution["due_date"])
+            points_by_user[tx["user_id"]] += points
+            member_update, period_update = summary_service.paid_updates(
+                contribution, tx["amount"], points, on_time=now <= contribution["due_date"], paid_at=now
+            )
+            member_summary_writes.append(member_update)
+            period_summary_writes.append(period_update)
+            outcomes[str(tx["_id"])]["points"] = points
+
+        for tx in tx_by_contribution.values():
+            if "points" not in outcomes[str(tx["_id"])]:
+                outcomes[str(tx["_id"])]["detail"] = "Contribution already paid"
+
+        if points_by_user:
+            await db.users.bulk_write([
+                UpdateOne({"_id": ObjectId(user_id)}, {"$inc": {"contribution_score": points}})
+                for user_id, points in points_by_user.items()
+            ], ordered=False, session=session)
+            await db.member_summaries.bulk_write(member_summary_writes, ordered=False, session=session)
+            await db.period_summaries.bulk_write(period_summary_writes, ordered=False, session=session)
+            audits.extend(_score_audit(actor_id, user_id, points) for user_id, points in points_by_user.items())
+
+        await audit_service.log_actions(audits, session=session)
+        return outcomes, [tx["user_id"] for tx in won], list(points_by_user)
+
+    outcomes, members, scored_users = await run_in_transaction(apply)
+    if members:
+        await _invalidate(db, members, scored_users)
+
+    return {
+        "action": action,
+        "requested": len(ids),
+        "processed": len(members),
+        "results": [outcomes[transaction_id] for transaction_id in ids],
+    }
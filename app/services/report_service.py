@@ -0,0 +1,209 @@
+"""
+Treasurer reports computed with server-side aggregation pipelines.
+
+Results are cached in-process per (report, parameters). Every report declares the
+collections it reads, and the write paths call `invalidate(<collection>)`, which bumps
+that collection's version so stale entries are never served. A TTL bounds staleness
+for writes made by other worker processes.
+"""
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.config import settings
+from app.db.mongodb import secondary_reads
+from app.models.contribution import ContributionStatus
+from app.models.welfare import RequestStatus
+
+@dataclass(frozen=True)
+class Report:
+    name: str
+    collection: str
+    sources: Tuple[str, ...]
+    fields: List[str]
+    pipeline: Callable[..., List[dict]]
+
+def _collections_pipeline(year_from: Optional[int] = None, year_to: Optional[int] = None) -> List[dict]:
+    match = {}
+    if year_from is not None or year_to is not None:
+        match["year"] = {
+            **({"$gte": year_from} if year_from is not None else {}),
+            **({"$lte": year_to} if year_to is not None else {}),
+        }
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": {"year": "$year", "month": "$month"},
+            "total_due": {"$sum": "$amount_due"},
+            "total_paid": {"$sum": {"$ifNull": ["$amount_paid", 0]}},
+            "paid": {"$sum": {"$cond": [{"$eq": ["$status", ContributionStatus.PAID.value]}, 1, 0]}},
+            "dues": {"$sum": 1},
+            # Unsettled dues only, as on the member dashboard
+            "outstanding": {"$sum": {"$cond": [
+                {"$in": ["$status", [ContributionStatus.PENDING.value, ContributionStatus.LATE.value]]},
+                {"$subtract": ["$amount_due", {"$ifNull": ["$amount_paid", 0]}]},
+                0,
+            ]}},
+        }},
+        {"$sort": {"_id.year": 1, "_id.month": 1}},
+        {"$project": {
+            "_id": 0,
+            "year": "$_id.year",
+            "month": "$_id.month",
+            "dues": 1,
+            "paid": 1,
+            "total_due": 1,
+            "total_paid": 1,
+            "outstanding": 1,
+        }},
+    ]
+
+def _outstanding_by_graduation_year_pipeline() -> List[dict]:
+    return [
+        {"$match": {"status": {"$in": [ContributionStatus.PENDING.value, ContributionStatus.LATE.value]}}},
+        {"$group": {
+            "_id": "$user_id",
+            "outstanding": {"$sum": {"$subtract": ["$amount_due", {"$ifNull": ["$amount_paid", 0]}]}},
+            "dues": {"$sum": 1},
+        }},
+        # One lookup per member with dues, not per due
+        {"$lookup": {
+            "from": "users",
+            "let": {"uid": {"$convert": {"input": "$_id", "to": "objectId", "onError": None}}},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$_id", "$$uid"]}}},
+                {"$project": {"graduation_year": 1}},
+            ],
+            "as": "user",
+        }},
+        {"$group": {
+            "_id": {"$ifNull": [{"$first": "$user.graduation_year"}, None]},
+            "members": {"$sum": 1},
+            "dues": {"$sum": "$dues"},
+            "outstanding": {"$sum": "$outstanding"},
+        }},
+        {"$sort": {"_id": 1}},
+        {"$project": {"_id": 0, "graduation_year": "$_id", "members": 1, "dues": 1, "outstanding": 1}},
+    ]
+
+def _payment_methods_pipeline(status: Optional[str] = None) -> List[dict]:
+    return [
+        {"$match": {"status": status} if status else {}},
+        {"$group": {
+            "_id": {"payment_method": "$payment_method", "status": "$status"},
+            "transactions": {"$sum": 1},
+            "total_amount": {"$sum": "$amount"},
+        }},
+        {"$sort": {"total_amount": -1}},
+        {"$project": {
+            "_id": 0,
+            "payment_method": "$_id.payment_method",
+            "status": "$_id.status",
+            "transactions": 1,
+            "total_amount": 1,
+        }},
+    ]
+
+def _welfare_by_type_pipeline(status: str = RequestStatus.Disbursed.value) -> List[dict]:
+    return [
+        {"$match": {"status": status}},
+        {"$group": {
+            "_id": "$request_type",
+            "requests": {"$sum": 1},
+            "total_amount": {"$sum": "$amount_requested"},
+        }},
+        {"$sort": {"total_amount": -1}},
+        {"$project": {"_id": 0, "request_type": "$_id", "requests": 1, "total_amount": 1}},
+    ]
+
+REPORTS: Dict[str, Report] = {
+    report.name: report
+    for report in [
+        Report(
+            "collections", "contributions", ("contributions",),
+            ["year", "month", "dues", "paid", "total_due", "total_paid", "outstanding"],
+            _collections_pipeline,
+        ),
+        Report(
+            "outstanding-by-graduation-year", "contributions", ("contributions", "users"),
+            ["graduation_year", "members", "dues", "outstanding"],
+            _outstanding_by_graduation_year_pipeline,
+        ),
+        Report(
+            "payment-methods", "transactions", ("transactions",),
+            ["payment_method", "status", "transactions", "total_amount"],
+            _payment_methods_pipeline,
+        ),
+        Report(
+            "welfare-by-type", "welfare", ("welfare",),
+            ["request_type", "requests", "total_amount"],
+            _welfare_by_type_pipeline,
+        ),
+    ]
+}
+
+class ReportCache:
+    def __init__(self, ttl_seconds: float, max_rows: int, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self.max_entries = max_entries
+        self._versions: Dict[str, int] = {}
+        self._entries: Dict[tuple, Tuple[float, tuple, List[dict]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self, *collections: str) -> None:
+        for collection in collections:
+            self._versions[collection] = self._versions.get(collection, 0) + 1
+
+    def versions(self, sources: Tuple[str, ...]) -> tuple:
+        return tuple(self._versions.get(s, 0) for s in sources)
+
+    def get(self, key: tuple, versions: tuple) -> Optional[List[dict]]:
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic() and entry[1] == versions:
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        return None
+
+    def set(self, key: tuple, versions: tuple, rows: List[dict]) -> None:
+        if len(self._entries) >= self.max_entries:
+            # Drop the entry closest to expiry
+            del self._entries[min(self._entries, key=lambda k: self._entries[k][0])]
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, versions, rows)
+
+report_cache = ReportCache(
+    ttl_seconds=settings.REPORT_CACHE_TTL_SECONDS,
+    max_rows=settings.REPORT_CACHE_MAX_ROWS,
+)
+
+def invalidate(*collections: str) -> None:
+    report_cache.invalidate(*collections)
+
+async def iter_report(db: AsyncIOMotorDatabase, name: str, **params) -> AsyncIterator[dict]:
+    """
+    Yields report rows, from the cache when possible. Rows are streamed from the
+    aggregation cursor as they arrive; results small enough are cached on the way.
+    """
+    report = REPORTS[name]
+    key = (name, tuple(sorted(params.items())))
+    versions = report_cache.versions(report.sources)
+
+    cached = report_cache.get(key, versions)
+    if cached is not None:
+        for row in cached:
+            yield row
+        return
+
+    rows: Optional[List[dict]] = []
+    cursor = secondary_reads(db[report.collection]).aggregate(report.pipeline(**params), allowDiskUse=True, batchSize=500)
+    async for row in cursor:
+        if rows is not None:
+            rows.append(row)
+            if len(rows) > report_cache.max_rows:
+                rows = None  # Too large to cache, keep streaming
+        yield row
+
+    if rows is not None:
+        report_cache.set(key, versions, rows)
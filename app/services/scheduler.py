@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+from app.core.config import settings
+from app.services.job_service import JobAlreadyRunning, job_runner
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks for due schedules
+TICK_SECONDS = 30
+
+CLAIM_LEASE = timedelta(seconds=settings.SCHEDULER_CLAIM_LEASE_SECONDS)
+
+class CronSchedule:
+    """
+    Minimal 5-field cron expression (minute hour day-of-month month day-of-week), evaluated in UTC.
+    Supports `*`, lists, ranges and steps, e.g. "0 2 * * *" or "*/15 8-18 * * 1-5".
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Invalid cron expression {expression!r}: expected 5 fields")
+
+        self.expression = expression
+        self.minutes = self._parse(fields[0], 0, 59)
+        self.hours = self._parse(fields[1], 0, 23)
+        self.days = self._parse(fields[2], 1, 31)
+        self.months = self._parse(fields[3], 1, 12)
+        self.weekdays = {d % 7 for d in self._parse(fields[4], 0, 7)}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse(field: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for part in field.split(","):
+            step = 1
+            if "/" in part:
+                part, step_str = part.split("/", 1)
+                step = int(step_str)
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                start_str, end_str = part.split("-", 1)
+                start, end = int(start_str), int(end_str)
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"Invalid cron field {field!r}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, dt: datetime) -> bool:
+        weekday = (dt.weekday() + 1) % 7  # cron counts from Sunday = 0
+        if self._any_day:
+            return weekday in self.weekdays
+        if self._any_weekday:
+            return dt.day in self.days
+        # Like cron, a restricted day-of-month and day-of-week match either
+        return dt.day in self.days or weekday in self.weekdays
+
+    def next_after(self, after: datetime) -> datetime:
+        dt = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = after + timedelta(days=366 * 5)
+        while dt <= limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+            elif dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+            elif dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+            else:
+                return dt
+        raise ValueError(f"Cron expression {self.expression!r} never fires")
+
+def configured_schedules() -> Dict[str, CronSchedule]:
+    """
+    Job kind -> schedule, from Settings. An empty expression disables that job.
+    """
+    expressions = {
+        "generate_monthly": settings.SCHEDULE_GENERATE_MONTHLY,
+        "mark_late": settings.SCHEDULE_MARK_LATE,
+        "send_reminders": settings.SCHEDULE_REMINDERS,
+    }
+    return {kind: CronSchedule(expr) for kind, expr in expressions.items() if expr.strip()}
+
+class Scheduler:
+    """
+    Fires registered background jobs on their cron schedules.
+
+    Each fire time is claimed by inserting a `scheduler_runs` document whose _id is the
+    (kind, slot) pair, so when several worker processes run the scheduler only the one
+    whose insert succeeds runs the job. The same document records the run's outcome.
+
+    A claim is a lease: its owner extends `lease_until` while the run is in progress and
+    hands it back on shutdown. An unfinished run whose lease has lapsed (its worker died)
+    is taken over by the next worker to tick, so the slot still runs. Rerunning is safe:
+    generating and marking late skip work already done, and reminders skip members
+    recorded on the run's `notified` list.
+    """
+
+    def __init__(self, schedules: Dict[str, CronSchedule]):
+        self.schedules = schedules
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._next: Dict[str, datetime] = {}
+        self._loop_task: Optional[asyncio.Task] = None
+        self._runs: Set[asyncio.Task] = set()
+
+    def start(self, db: AsyncIOMotorDatabase) -> None:
+        now = datetime.utcnow()
+        self._next = {kind: schedule.next_after(now) for kind, schedule in self.schedules.items()}
+        self._loop_task = asyncio.create_task(self._loop(db))
+        logger.info("Scheduler started: %s", {k: v.isoformat() for k, v in self._next.items()})
+
+    async def stop(self) -> None:
+        tasks = [t for t in [self._loop_task, *self._runs] if t]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop_task = None
+
+    async def _loop(self, db: AsyncIOMotorDatabase):
+        while True:
+            now = datetime.utcnow()
+            for kind, fire_at in list(self._next.items()):
+                if fire_at <= now:
+                    self._next[kind] = self.schedules[kind].next_after(now)
+                    self._spawn(self._fire(db, kind, fire_at))
+            try:
+                await self._recover(db)
+            except Exception:
+                logger.exception("Failed to check for abandoned scheduler runs")
+            await asyncio.sleep(TICK_SECONDS)
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._runs.add(task)
+        task.add_done_callback(self._runs.discard)
+
+    async def _fire(self, db: AsyncIOMotorDatabase, kind: str, slot: datetime):
+        run_id = f"{kind}:{slot:%Y-%m-%dT%H:%M}"
+        now = datetime.utcnow()
+        try:
+            await db.scheduler_runs.insert_one({
+                "_id": run_id,
+                "kind": kind,
+                "scheduled_for": slot,
+                "owner": self.owner,
+                "status": "claimed",
+                "started_at": now,
+                "lease_until": now + CLAIM_LEASE,
+            })
+        except DuplicateKeyError:
+            return  # Another worker owns this slot; _recover picks it up if that worker dies
+        await self._run(db, kind, run_id)
+
+    async def _recover(self, db: AsyncIOMotorDatabase):
+        """
+        Takes over unfinished runs of our job kinds whose lease has lapsed.
+        """
+        now = datetime.utcnow()
+        expired = {"finished_at": {"$exists": False}, "lease_until": {"$lt": now}}
+        candidates = await db.scheduler_runs.find(
+            {**expired, "kind": {"$in": list(self.schedules)}}, {"_id": 1}
+        ).to_list(length=None)
+        for candidate in candidates:
+            # Guarded on the lapsed lease, so only one worker wins each takeover
+            run = await db.scheduler_runs.find_one_and_update(
+                {"_id": candidate["_id"], **expired},
+                {
+                    "$set": {"owner": self.owner, "status": "claimed", "lease_until": now + CLAIM_LEASE},
+                    "$inc": {"takeovers": 1},
+                },
+            )
+            if run is not None:
+                logger.warning("Taking over scheduled run %s from %s", run["_id"], run.get("owner"))
+                self._spawn(self._run(db, run["kind"], run["_id"]))
+
+    async def _renew(self, db: AsyncIOMotorDatabase, run_id: str):
+        while True:
+            await asyncio.sleep(CLAIM_LEASE.total_seconds() / 3)
+            try:
+                await db.scheduler_runs.update_one(
+                    {"_id": run_id, "owner": self.owner},
+                    {"$set": {"lease_until": datetime.utcnow() + CLAIM_LEASE}},
+                )
+            except Exception:
+                logger.exception("Failed to renew the lease on scheduled run %s", run_id)
+
+    async def _run(self, db: AsyncIOMotorDatabase, kind: str, run_id: str):
+        renewer = asyncio.create_task(self._renew(db, run_id))
+        update = {}
+        try:
+            job_id = await job_runner.enqueue(db, kind, actor_id="SYSTEM", params={"scheduler_run_id": run_id})
+            await db.scheduler_runs.update_one({"_id": run_id}, {"$set": {"status": "running", "job_id": job_id}})
+            await job_runner.wait(job_id)
+            job = await db.jobs.find_one({"_id": ObjectId(job_id)})
+            update = {"status": job["status"], "result": job.get("result"), "error": job.get("error")}
+        except JobAlreadyRunning as e:
+            update = {"status": "skipped", "error": f"Job {e.job_id} already in progress"}
+        except asyncio.CancelledError:
+            # Hand the slot back so another worker runs it
+            update = {"status": "claimed", "error": "Interrupted by shutdown", "lease_until": datetime.utcnow()}
+            raise
+        except Exception as e:
+            logger.exception("Scheduled %s run failed", kind)
+            update = {"status": "failed", "error": str(e)}
+        finally:
+            renewer.cancel()
+            if update.get("status") != "claimed":
+                update["finished_at"] = datetime.utcnow()
+            # Guarded on ownership, in case the lease lapsed and another worker took over
+            await db.scheduler_runs.update_one({"_id": run_id, "owner": self.owner}, {"$set": update})
+
+    def next_runs(self) -> List[dict]:
+        return [
+            {"kind": kind, "schedule": self.schedules[kind].expression, "next_run": fire_at}
+            for kind, fire_at in sorted(self._next.items(), key=lambda item: item[1])
+        ]
+
+scheduler = Scheduler(configured_schedules())
@@ -0,0 +1,130 @@
+import re
+import unicodedata
+from typing import List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from app.core.config import settings
+from app.db.mongodb import secondary_reads
+
+# Prefixes shorter than this are not indexed; longer search terms are truncated to the maximum
+MIN_PREFIX = 2
+MAX_PREFIX = 15
+
+# Upper bound on candidates pulled from the index before ranking
+MAX_CANDIDATES = 500
+
+SEARCH_FIELDS = ("full_name", "email", "phone")
+
+# Set once backfill_search_tokens has run in this process (at startup, see main.py);
+# until then, users without tokens are also matched on their email prefix
+_backfilled = False
+
+def normalize_words(text: Optional[str]) -> List[str]:
+    """
+    Lowercases, strips accents and splits on anything that isn't a letter or digit.
+    """
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return [w for w in re.split(r"[^a-z0-9]+", text.lower()) if w]
+
+def _prefixes(word: str) -> List[str]:
+    return [word[:i] for i in range(MIN_PREFIX, min(len(word), MAX_PREFIX) + 1)]
+
+def _phone_digits(phone: Optional[str]) -> List[str]:
+    digits = re.sub(r"\D", "", phone or "")
+    if not digits:
+        return []
+    # Also index the national significant number so "0803..." and "+234803..." both match "803"
+    return list({digits, digits.lstrip("0"), digits[-10:]})
+
+def build_search_tokens(full_name: str = None, email: str = None, phone: str = None) -> List[str]:
+    """
+    Edge n-grams of every name word, email part and phone number, stored on the user as
+    `search_tokens` and served by a multikey index.
+    """
+    words = normalize_words(full_name) + normalize_words(email)
+    if email:
+        words.append(email.split("@", 1)[0].lower())
+    words += _phone_digits(phone)
+
+    tokens = set()
+    for word in words:
+        tokens.update(_prefixes(word))
+    return sorted(tokens)
+
+def search_tokens_for(user: dict) -> List[str]:
+    return build_search_tokens(*(user.get(field) for field in SEARCH_FIELDS))
+
+def _query_terms(search: str) -> List[str]:
+    return [word[:MAX_PREFIX] for word in normalize_words(search) if len(word) >= MIN_PREFIX]
+
+def _rank(user: dict, terms: List[str]) -> int:
+    name_words = normalize_words(user.get("full_name"))
+    email = (user.get("email") or "").lower()
+    score = 0
+    for term in terms:
+        if term in name_words:
+            score += 4  # whole name word
+        elif name_words and name_words[0].startswith(term):
+            score += 3  # start of first name
+        elif any(w.startswith(term) for w in name_words):
+            score += 2
+        elif email.startswith(term):
+            score += 2
+        else:
+            score += 1  # other email part or phone
+    return score
+
+async def search_members(db: AsyncIOMotorDatabase, search: str, limit: int) -> List[dict]:
+    """
+    Ranked member search over the `search_tokens` index. Input shorter than MIN_PREFIX
+    is matched as an anchored prefix of the tokens. Every query runs on index bounds;
+    no match means no results, never a collection scan.
+    """
+    users = secondary_reads(db.users)
+    terms = _query_terms(search)
+    words = normalize_words(search)
+    if terms:
+        candidates = await users.find({"search_tokens": {"$all": terms}}).max_time_ms(
+            settings.MONGO_INTERACTIVE_MAX_TIME_MS
+        ).to_list(length=MAX_CANDIDATES)
+        candidates.sort(key=lambda u: (-_rank(u, terms), u.get("full_name") or ""))
+        results = candidates[:limit]
+    elif words:
+        # Case-sensitive and anchored on the lowercased tokens, so the index bounds apply
+        prefix = {"$regex": f"^{re.escape(words[0])}"}
+        results = await users.find({"search_tokens": prefix}).limit(limit).max_time_ms(
+            settings.MONGO_INTERACTIVE_MAX_TIME_MS
+        ).to_list(length=limit)
+    else:
+        return []
+
+    if not _backfilled and len(results) < limit:
+        # Users created before search indexing have no tokens yet; match their email
+        # prefix on the email_unique index instead
+        prefix = {"$regex": f"^{re.escape(search.strip().lower())}"}
+        results += await users.find(
+            {"email": prefix, "search_tokens": {"$exists": False}}
+        ).limit(limit - len(results)).max_time_ms(
+            settings.MONGO_INTERACTIVE_MAX_TIME_MS
+        ).to_list(length=limit - len(results))
+    return results
+
+async def backfill_search_tokens(db: AsyncIOMotorDatabase, batch_size: int = 500) -> int:
+    """
+    Adds `search_tokens` to users created before search indexing existed.
+    """
+    global _backfilled
+    updated = 0
+    batch = []
+    projection = {field: 1 for field in SEARCH_FIELDS}
+    async for user in db.users.find({"search_tokens": {"$exists": False}}, projection):
+        batch.append(UpdateOne({"_id": user["_id"]}, {"$set": {"search_tokens": search_tokens_for(user)}}))
+        if len(batch) >= batch_size:
+            updated += (await db.users.bulk_write(batch, ordered=False)).modified_count
+            batch = []
+    if batch:
+        updated += (await db.users.bulk_write(batch, ordered=False)).modified_count
+    _backfilled = True
+    return updated
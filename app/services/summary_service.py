@@ -0,0 +1,207 @@
+"""
+Maintains pre-aggregated dashboard figures:
+
+- `member_summaries`, one document per member (_id = user_id)
+- `period_summaries`, one document per billing period (_id = "YYYY-MM")
+
+Write paths apply small $inc updates as contributions are generated, marked late
+and paid, so dashboards read a single document instead of scanning contributions.
+`rebuild_summaries` recomputes everything from source data for backfill and repair;
+startup runs it when no rebuild has completed at the current SUMMARY_VERSION.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterable, List
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReplaceOne, UpdateOne
+from app.core import http_cache
+from app.models.contribution import ContributionStatus
+from app.models.job import JobStatus
+
+# Bumped whenever summaries gain a field that existing documents lack (2: balance_due)
+SUMMARY_VERSION = 2
+
+_STATUS_COUNTERS = {
+    ContributionStatus.PENDING: "count_pending",
+    ContributionStatus.LATE: "count_late",
+    ContributionStatus.PAID: "count_paid",
+}
+
+# amount_due - amount_paid of an unsettled (Pending or Late) due, else 0
+_open_balance = {"$cond": [
+    {"$in": ["$status", [ContributionStatus.PENDING.value, ContributionStatus.LATE.value]]},
+    {"$subtract": ["$amount_due", {"$ifNull": ["$amount_paid", 0]}]},
+    0,
+]}
+
+def period_id(year: int, month: int) -> str:
+    return f"{year:04d}-{month:02d}"
+
+def _period_update(year: int, month: int, inc: dict) -> UpdateOne:
+    return UpdateOne(
+        {"_id": period_id(year, month)},
+        {"$inc": inc, "$set": {"year": year, "month": month, "updated_at": datetime.utcnow()}},
+        upsert=True,
+    )
+
+async def record_generated(db: AsyncIOMotorDatabase, contributions: Iterable[dict]):
+    """
+    New Pending dues were created.
+    """
+    per_user = defaultdict(lambda: {"total_due": 0.0, "balance_due": 0.0, "count_pending": 0})
+    per_period = defaultdict(lambda: {"total_due": 0.0, "balance_due": 0.0, "count_pending": 0})
+    for c in contributions:
+        for bucket in (per_user[c["user_id"]], per_period[(c["year"], c["month"])]):
+            bucket["total_due"] += c["amount_due"]
+            bucket["balance_due"] += c["amount_due"]
+            bucket["count_pending"] += 1
+
+    if not per_user:
+        return
+    now = datetime.utcnow()
+    await db.member_summaries.bulk_write([
+        UpdateOne({"_id": user_id}, {"$inc": inc, "$set": {"updated_at": now}}, upsert=True)
+        for user_id, inc in per_user.items()
+    ], ordered=False)
+    await db.period_summaries.bulk_write(
+        [_period_update(year, month, inc) for (year, month), inc in per_period.items()],
+        ordered=False,
+    )
+
+async def record_marked_late(db: AsyncIOMotorDatabase, contributions: Iterable[dict]):
+    """
+    Pending dues passed their due date. Breaks the member's on-time streak.
+    """
+    per_user = defaultdict(int)
+    per_period = defaultdict(int)
+    for c in contributions:
+        per_user[c["user_id"]] += 1
+        per_period[(c["year"], c["month"])] += 1
+
+    if not per_user:
+        return
+    now = datetime.utcnow()
+    await db.member_summaries.bulk_write([
+        UpdateOne(
+            {"_id": user_id},
+            {"$inc": {"count_pending": -n, "count_late": n}, "$set": {"streak": 0, "updated_at": now}},
+            upsert=True,
+        )
+        for user_id, n in per_user.items()
+    ], ordered=False)
+    await db.period_summaries.bulk_write([
+        _period_update(year, month, {"count_pending": -n, "count_late": n})
+        for (year, month), n in per_period.items()
+    ], ordered=False)
+
+def paid_updates(contribution: dict, amount_paid: float, points: int, on_time: bool, paid_at: datetime):
+    """
+    (member update, period update) for a Pending or Late due that was just paid.
+    """
+    previous = _STATUS_COUNTERS.get(ContributionStatus(contribution["status"]))
+    if previous not in ("count_pending", "count_late"):
+        raise ValueError(f"Cannot pay a {contribution['status']} contribution")
+    open_balance = contribution["amount_due"] - contribution.get("amount_paid", 0)
+    inc = {"total_paid": amount_paid, "count_paid": 1, previous: -1, "balance_due": -open_balance}
+
+    member_update = {"$inc": {**inc, "score": points}, "$set": {"last_paid_at": paid_at, "updated_at": paid_at}}
+    if on_time:
+        member_update["$inc"]["streak"] = 1
+    else:
+        member_update["$set"]["streak"] = 0
+
+    return (
+        UpdateOne({"_id": contribution["user_id"]}, member_update, upsert=True),
+        _period_update(contribution["year"], contribution["month"], inc),
+    )
+
+def _streak(history: List[dict]) -> int:
+    """
+    Consecutive on-time payments, newest first. Pending dues (not yet late) are skipped.
+    """
+    streak = 0
+    for entry in history:
+        if entry["status"] == ContributionStatus.PAID.value and entry["on_time"]:
+            streak += 1
+        elif entry["status"] in (ContributionStatus.PAID.value, ContributionStatus.LATE.value):
+            break
+    return streak
+
+async def rebuild_summaries(db: AsyncIOMotorDatabase, progress=None) -> dict:
+    """
+    Recomputes every member and period summary from contributions and users.
+    """
+    totals = {
+        "total_due": {"$sum": "$amount_due"},
+        "total_paid": {"$sum": {"$ifNull": ["$amount_paid", 0]}},
+        "balance_due": {"$sum": _open_balance},
+        **{
+            counter: {"$sum": {"$cond": [{"$eq": ["$status", status.value]}, 1, 0]}}
+            for status, counter in _STATUS_COUNTERS.items()
+        },
+    }
+    now = datetime.utcnow()
+
+    scores = {}
+    async for user in db.users.find({}, {"contribution_score": 1}):
+        scores[str(user["_id"])] = user.get("contribution_score", 0)
+
+    member_writes: List[ReplaceOne] = []
+    async for group in db.contributions.aggregate([
+        {"$sort": {"year": -1, "month": -1}},
+        {"$group": {
+            "_id": "$user_id",
+            **totals,
+            "last_paid_at": {"$max": "$paid_at"},
+            # Newest first, for the streak
+            "history": {"$push": {
+                "status": "$status",
+                "on_time": {"$lte": ["$paid_at", "$due_date"]},
+            }},
+        }},
+    ], allowDiskUse=True):
+        history = group.pop("history")
+        member_writes.append(ReplaceOne(
+            {"_id": group["_id"]},
+            {
+                **group,
+                "streak": _streak(history),
+                "score": scores.get(group["_id"], 0),
+                "updated_at": now,
+            },
+            upsert=True,
+        ))
+
+    period_writes = []
+    async for group in db.contributions.aggregate([
+        {"$group": {"_id": {"year": "$year", "month": "$month"}, **totals}},
+    ]):
+        year, month = group["_id"]["year"], group["_id"]["month"]
+        period_writes.append(ReplaceOne(
+            {"_id": period_id(year, month)},
+            {**group, "_id": period_id(year, month), "year": year, "month": month, "updated_at": now},
+            upsert=True,
+        ))
+
+    for i in range(0, len(member_writes), 1000):
+        await db.member_summaries.bulk_write(member_writes[i:i + 1000], ordered=False)
+        if progress:
+            await progress(min(i + 1000, len(member_writes)), len(member_writes))
+    if period_writes:
+        await db.period_summaries.bulk_write(period_writes, ordered=False)
+    await http_cache.bump(db, [http_cache.ALL_MEMBERS], http_cache.CONTRIBUTIONS)
+
+    return {"members": len(member_writes), "periods": len(period_writes), "version": SUMMARY_VERSION}
+
+async def summaries_need_rebuild(db: AsyncIOMotorDatabase) -> bool:
+    """
+    True when contributions exist but no rebuild has completed at SUMMARY_VERSION, so
+    summaries are missing or only hold what the $inc paths recorded since the upgrade.
+    """
+    rebuilt = await db.jobs.find_one(
+        {"kind": "rebuild_summaries", "status": JobStatus.DONE.value, "result.version": {"$gte": SUMMARY_VERSION}},
+        {"_id": 1},
+    )
+    if rebuilt:
+        return False
+    return await db.contributions.find_one({}, {"_id": 1}) is not None
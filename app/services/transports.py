@@ -0,0 +1,107 @@
+import asyncio
+import json
+import logging
+import smtplib
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from email.message import EmailMessage
+from pathlib import Path
+from typing import Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class OutgoingMessage:
+    to: str
+    subject: str
+    body: str
+    user_id: Optional[str] = None
+
+class Transport(ABC):
+    """
+    Delivers notification messages. Implementations raise on failure so callers can retry.
+    """
+    name = "base"
+
+    @abstractmethod
+    async def send(self, message: OutgoingMessage) -> None:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+class LogTransport(Transport):
+    """
+    Development stand-in: writes each message to the application log.
+    """
+    name = "log"
+
+    async def send(self, message: OutgoingMessage) -> None:
+        logger.info("Reminder to %s: %s", message.to, message.subject)
+
+class FileTransport(Transport):
+    """
+    Appends messages as JSON lines to an outbox file, for inspection in staging.
+    """
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = asyncio.Lock()
+
+    async def send(self, message: OutgoingMessage) -> None:
+        line = json.dumps(asdict(message)) + "\n"
+        async with self._lock:
+            await asyncio.to_thread(self._append, line)
+
+    def _append(self, line: str) -> None:
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(line)
+
+class SmtpTransport(Transport):
+    """
+    Sends through an SMTP relay (or `python -m aiosmtpd -n` as a local debugging server).
+    smtplib is blocking, so each send runs in a worker thread.
+    """
+    name = "smtp"
+
+    def __init__(self, host: str, port: int, sender: str, username: str = None, password: str = None):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+
+    async def send(self, message: OutgoingMessage) -> None:
+        await asyncio.to_thread(self._send, message)
+
+    def _send(self, message: OutgoingMessage) -> None:
+        email = EmailMessage()
+        email["From"] = self.sender
+        email["To"] = message.to
+        email["Subject"] = message.subject
+        email.set_content(message.body)
+
+        with smtplib.SMTP(self.host, self.port, timeout=30) as smtp:
+            if self.username:
+                smtp.starttls()
+                smtp.login(self.username, self.password)
+            smtp.send_message(email)
+
+def get_transport(name: str = None) -> Transport:
+    name = name or settings.REMINDER_TRANSPORT
+    if name == "log":
+        return LogTransport()
+    if name == "file":
+        return FileTransport(settings.REMINDER_OUTBOX_PATH)
+    if name == "smtp":
+        return SmtpTransport(
+            settings.SMTP_HOST,
+            settings.SMTP_PORT,
+            settings.SMTP_FROM,
+            settings.SMTP_USERNAME,
+            settings.SMTP_PASSWORD,
+        )
+    raise ValueError(f"Unknown reminder transport {name!r}")
@@ -0,0 +1,99 @@
+// Simple JS for alerts/interactions
+async function handleLogout() {
+    const refreshToken = localStorage.getItem('refresh_token');
+    localStorage.removeItem('access_token');
+    localStorage.removeItem('refresh_token');
+    if (refreshToken) {
+        try {
+            await fetch('/api/v1/auth/logout', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ refresh_token: refreshToken })
+            });
+        } catch (err) {
+            console.error(err);
+        }
+    }
+    window.location.href = '/login';
+}
+
+// Access tokens are short-lived; the refresh token is swapped for a new pair before
+// they expire, and once more if the API still answers 401
+function tokenExpiresAt(token) {
+    try {
+        const payload = token.split('.')[1].replace(/-/g, '+').replace(/_/g, '/');
+        return JSON.parse(atob(payload)).exp * 1000;
+    } catch (err) {
+        return 0;
+    }
+}
+
+let pendingRefresh = null;
+
+// Concurrent callers share one refresh, since each refresh token can be used only once
+function refreshAccessToken() {
+    if (!pendingRefresh) {
+        pendingRefresh = (async () => {
+            const refreshToken = localStorage.getItem('refresh_token');
+            if (!refreshToken) return false;
+            const res = await fetch('/api/v1/auth/refresh', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ refresh_token: refreshToken })
+            });
+            if (res.ok) {
+                const data = await res.json();
+                localStorage.setItem('access_token', data.access_token);
+                localStorage.setItem('refresh_token', data.refresh_token);
+                return true;
+            }
+            // Another tab may have rotated it meanwhile; only drop a token nobody replaced
+            if (res.status === 401 && localStorage.getItem('refresh_token') === refreshToken) {
+                localStorage.removeItem('refresh_token');
+            }
+            return localStorage.getItem('refresh_token') !== refreshToken;
+        })().catch((err) => {
+            console.error(err);
+            return false;
+        }).finally(() => {
+            pendingRefresh = null;
+        });
+    }
+    return pendingRefresh;
+}
+
+async function getAccessToken() {
+    const token = localStorage.getItem('access_token');
+    if (!token || tokenExpiresAt(token) - Date.now() < 60 * 1000) {
+        await refreshAccessToken();
+    }
+    return localStorage.getItem('access_token');
+}
+
+// fetch() with the bearer token; on 401 refreshes once and retries
+async function authFetch(url, options = {}) {
+    const send = async () => fetch(url, {
+        ...options,
+        headers: { ...(options.headers || {}), 'Authorization': `Bearer ${await getAccessToken()}` }
+    });
+    const res = await send();
+    if (res.status === 401 && await refreshAccessToken()) {
+        return send();
+    }
+    return res;
+}
+
+// Follows next_cursor through a paginated list endpoint and returns every item
+async function fetchAllPages(url) {
+    const items = [];
+    let cursor = null;
+    do {
+        const pageUrl = cursor ? `${url}${url.includes('?') ? '&' : '?'}cursor=${encodeURIComponent(cursor)}` : url;
+        const res = await authFetch(pageUrl);
+        if (!res.ok) throw new Error(`Request failed: ${res.status}`);
+        const page = await res.json();
+        items.push(...page.items);
+        cursor = page.next_cursor;
+    } while (cursor);
+    return items;
+}
@@ -0,0 +1,15 @@
+tailwind.config = {
+    theme: {
+        extend: {
+            colors: {
+                primary: '#1e3a8a', // Deep Blue
+                secondary: '#10b981', // Emerald
+                accent: '#f59e0b', // Amber
+                dark: '#0f172a',
+            },
+            fontFamily: {
+                sans: ['Inter', 'sans-serif'],
+            }
+        }
+    }
+}